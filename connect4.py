@@ -1,8 +1,8 @@
-import logging
 from world import World
 import numpy as np
 from utility import int2board
 from utility import board2int
+from utility import get_cells_mask
 from utility import get_row_col_diags
 from output_handler import OutputHandler
 
@@ -13,18 +13,44 @@ class WorldCon4(World):
     game board and game mechanics.
     """
 
+    __slots__ = ('col_masks', 'row_masks')
+
     def __init__(self,
         player1sym:str, 
         player2sym:str, 
-        output_handler:OutputHandler
+        output_handler:OutputHandler,
+        tt_max_size:int=1<<20,
+        tt_next_max_size:int=1<<16
     ):
-        """ Constructor. """
+        """ 
+        Constructor. 
+        @param tt_max_size: Max. no. of entries that each
+                            transposition table can hold
+                            (see World.__init__(...)).
+        @param tt_next_max_size: Max. no. of entries of the
+                                 next states table (see
+                                 World.__init__(...)).
+        """
         super().__init__(
             type="con4",
             board_size=(6, 7), 
             player1sym=player1sym, 
             player2sym=player2sym,
             output_handler=output_handler,
+            tt_max_size=tt_max_size,
+            tt_next_max_size=tt_next_max_size,
+            win_length=4
+        )
+        # Bits of all cells in each column and 
+        # each row (see World.cell_bits).
+        self.col_masks = tuple(
+            sum(self.cell_bits[col_idx::self.board_shape[1]])
+            for col_idx in range(self.board_shape[1])
+        )
+        self.row_masks = tuple(
+            sum(self.cell_bits[
+                row_idx*self.board_shape[1]:(row_idx+1)*self.board_shape[1]
+            ]) for row_idx in range(self.board_shape[0])
         )
 
     def can_connect4(self, board:np.ndarray):
@@ -433,7 +459,7 @@ class WorldCon4(World):
         """
         return [
             (col_idx, 1) if is_player1 else (col_idx, 2)
-            for col_idx in range(self.board.shape[1])
+            for col_idx in range(self.board_shape[1])
         ]
 
     def is_legal(self, num_board:np.ndarray, action:tuple) -> bool:
@@ -447,21 +473,84 @@ class WorldCon4(World):
         @return: True if action is legal and false otherwise.
         """
         # Player part of the action may only be either 1 or 0.
-        if not action[1] in [1, 2]:
+        if action[1] != 1 and action[1] != 2:
             return False
         
         # Action tries to put piece in a non-existent
         # column => illegal action.
-        if action[0] < 0 or action[0] >= num_board.shape[1]:
+        if not 0 <= action[0] < self.board_shape[1]:
             return False
 
         # Action tries to input a piece into a 
         # column that is already full => illegal action.
-        if num_board[0, action[0]] != -1: 
+        # Top cells are the first cells in row major order.
+        if isinstance(num_board, int):
+            if num_board & self.cell_bits[action[0]]:
+                return False
+        elif num_board[0, action[0]] != -1: 
             return False
                 
         return True
 
+    def __is_valid_int(self, board_int:int, is_player1:bool) -> bool:
+        """
+        Checks the same rules as is_valid(...) using 
+        bit operations on a board integer.
+        @param board_int: Board from this player's 
+                          perspective as an integer.
+        @param is_player1: If true, then this is the first player.
+                           Else, it is the second player.
+        @return: False if this is an invalid state and
+                 true otherwise.
+        """
+        spaces = board_int & self.spaces_mask
+        pieces_me = board_int >> self.num_cells
+        pieces_opp = spaces & ~pieces_me
+        num_me = pieces_me.bit_count()
+        num_opponent = pieces_opp.bit_count()
+        if abs(num_me - num_opponent) > 1:
+            return False
+        if is_player1:
+            if num_opponent > num_me:
+                return False
+        else:
+            if num_me > num_opponent:
+                return False
+
+        # Lower rows have lower bits, so a column has no
+        # piece without a piece below it if its lowest 
+        # free cell is above its highest piece.
+        for col_mask in self.col_masks:
+            col_free = col_mask & ~spaces
+            if col_free and (col_free & -col_free) < (spaces & col_mask):
+                return False
+
+        if self.has_line(pieces_me) and self.has_line(pieces_opp):
+            return False
+
+        # Pieces of the player who moved first or 
+        # second in even or odd rows respectively need
+        # pieces of the same kind below them.
+        num_rows = self.board_shape[0]
+        for i in range(num_rows):
+            row_mask = self.row_masks[i]
+            below_mask = sum(self.row_masks[i+1:])
+            if i % 2 == 0:
+                pieces_checked = pieces_me if is_player1 else pieces_opp
+                if pieces_checked & row_mask and not pieces_checked & below_mask:
+                    return False
+            else:
+                pieces_checked, pieces_other = (
+                    (pieces_opp, pieces_me) if is_player1
+                    else (pieces_me, pieces_opp)
+                )
+                if pieces_checked & row_mask and (
+                    i == num_rows - 1 and not pieces_other & row_mask or
+                    i != num_rows - 1 and not pieces_checked & below_mask
+                ): return False
+
+        return True
+
     def is_valid(self, num_board:np.ndarray, is_player1:bool) -> bool:
         """ Given a board, return if it is a valid
             state or not.
@@ -472,6 +561,9 @@ class WorldCon4(World):
             @param: Returns false if this is an invalid state and
                     true otherwise.
         """
+        if isinstance(num_board, int):
+            return self.__is_valid_int(num_board, is_player1)
+
         num_me = np.count_nonzero(num_board == 1)
         num_opponent = np.count_nonzero(num_board == 0)
         
@@ -589,44 +681,37 @@ class WorldCon4(World):
         # None of above checks were met => Valid.
         return True
 
-    def is_winner(self, num_board:np.ndarray) -> int:
-        """ 
-        Given a board, return if this player has won.
-        @param num_board: Board containing numbers from this
-                        player's perspective.
-        @param: Returns 1 if this player has won, -1 if the
-                the opponent has one and 0 if no one has won.
-        """
-        # If there are >=4 1s side by side in any direction,
-        # then this player has won. If the same
-        # is true for the opponent, then this player has lost.
-        # Else no one has won.
-        col_idx = 3
-        for row_idx in range(num_board.shape[0]):    
-            sbsa_diags_row_0, sbsa_diags_row_1 = self.compute_sbsa(
-                num_board, row_idx, col_idx, 
+    def get_win_mask_groups(self) -> list:
+        """
+        Returns masks of all 4 cell windows grouped by the
+        row, diagonal and anti-diagonal lines through the 
+        middle column of each row and then by each column,
+        with the opponent's pieces checked first in a group.
+        @return: List of 2 tuples of the order of player
+                 symbols to check and window masks.
+        """
+        def get_window_masks(lines) -> tuple:
+            masks = []
+            for line in lines:
+                positions = list(line.keys())
+                for start in range(len(positions) - 3):
+                    masks.append(get_cells_mask(
+                        positions[start:start+4], self.board_shape
+                    ))
+            return tuple(masks)
+
+        groups = []
+        for row_idx in range(self.board_shape[0]):
+            groups.append(((0, 1), get_window_masks(get_row_col_diags(
+                self.board, row_idx, 3, 
                 directions=['row', 'diag', 'antidiag']
-            )
-            for dir_res in sbsa_diags_row_0.values():
-                dir_res_gt4 = [1 if k >= 4 else 0 for k in dir_res.keys()]
-                if 1 in dir_res_gt4: return -1 # Lost
-            for dir_res in sbsa_diags_row_1.values():
-                dir_res_gt4 = [1 if k >= 4 else 0 for k in dir_res.keys()]
-                if 1 in dir_res_gt4: return 1 # Won
-        row_idx = 0
-        for col_idx in range(num_board.shape[1]):
-            sbsa_cols_0, sbsa_cols_1 = self.compute_sbsa(
-                num_board, row_idx, col_idx, 
-                directions=['col']
-            )
-            for dir_res in sbsa_cols_0.values():
-                dir_res_gt4 = [1 if k >= 4 else 0 for k in dir_res.keys()]
-                if 1 in dir_res_gt4: return -1 # Lost
-            for dir_res in sbsa_cols_1.values():
-                dir_res_gt4 = [1 if k >= 4 else 0 for k in dir_res.keys()]
-                if 1 in dir_res_gt4: return 1 # Won
-        return 0
-                
+            ).values())))
+        for col_idx in range(self.board_shape[1]):
+            groups.append(((0, 1), get_window_masks(get_row_col_diags(
+                self.board, 0, col_idx, directions=['col']
+            ).values())))
+        return groups
+
     def get_next_state(self, board, action:tuple) -> int:
         """
         Given a game board containing numbers
@@ -643,16 +728,62 @@ class WorldCon4(World):
         @return: Integer of next board from the perspective
                  of the player that took the action, or -1.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
-        
+        if isinstance(board, int):
+            return self.get_next_state_int(board, action)
+
+        next_state = self.get_next_board(board, action)
+        if next_state is None:
+            return -1
+        return board2int(next_state)
+
+    def get_legal_bit(self, action:tuple) -> int:
+        """
+        Returns the bit of the cell that must be free
+        for given action to be legal on a board.
+        @param action: A possible action.
+        @return: Bit of the cell in the spaces half of 
+                 board integers.
+        """
+        # Top cells are the first cells in row major order.
+        return self.cell_bits[action[0]]
+
+    def get_move_bit(self, board_int:int, action:tuple) -> int:
+        """
+        Returns the bit of the cell that a piece is placed
+        in upon executing given legal action on given board.
+        @param board_int: Game board as an integer.
+        @param action: The action to take.
+        @return: Bit of the cell in the spaces half of 
+                 board integers.
+        """
+        # Lower rows have lower bits, so the piece lands
+        # in the lowest set bit of the column's free cells.
+        free_bits = self.col_masks[action[0]] & ~board_int
+        return free_bits & -free_bits
+
+    def get_next_board(self, board:np.ndarray, action:tuple) -> np.ndarray:
+        """
+        Given a game board containing numbers
+        as per a given player's perspective,
+        and an action to take, returns the
+        resulting next game board. None is
+        returned if the action is illegal or
+        results in an invalid state.
+        @param board: Current game board from the
+                      perspective of the player who
+                      is going to execute the given action.
+                      It is assumed that this state is valid.
+        @param action: The action to take.
+        @return: Next board from the perspective of
+                 the player that took the action, or None.
+        """
         # If this action is illegal,
-        # then return -1.
+        # then return None.
         if not self.is_legal(board, action):
-            return -1
+            return None
         
         # If the resulting state is invalid,
-        # then return -1.
+        # then return None.
         is_player1 = (action[1]==1)
         next_state = board.copy()
         
@@ -663,11 +794,33 @@ class WorldCon4(World):
         next_state[row_idx, col_idx] = 1
 
         if not self.is_valid(next_state, is_player1):
-            return -1
+            return None
         
-        return board2int(next_state)
+        return next_state
+
+    def get_next_boards(self, board:np.ndarray, is_player1:bool) -> tuple:
+        """
+        Returns boards that result from executing each 
+        legal action on given board (valid or not).
+        @param board: Game board from the perspective of
+                      the player who executes the actions.
+        @param is_player1: Whether player 1 is making the move.
+        @return: 2 tuple with an array of next boards of shape
+                 (no. of legal actions, rows, columns) and 
+                 the list of actions that lead to them.
+        """
+        # Columns with a free top position are legal and
+        # each piece lands in the lowest free row of its column.
+        col_idxs = np.flatnonzero(board[0] == -1)
+        row_idxs = board.shape[0] - 1 - np.argmax(
+            board[::-1, col_idxs] == -1, axis=0
+        )
+        actions = self.actions[is_player1]
+        next_boards = np.repeat(board[None], len(col_idxs), axis=0)
+        next_boards[np.arange(len(col_idxs)), row_idxs, col_idxs] = 1
+        return next_boards, [actions[i] for i in col_idxs.tolist()]
 
-    def state_eval(self, board, is_my_turn_next:bool):
+    def compute_state_eval(self, board, is_my_turn_next:bool):
         """
         Computes the value of given state. 
         @param board: Game board from perspective of a player.
@@ -675,8 +828,8 @@ class WorldCon4(World):
                                 player's and false otherwise.
         @return: Value of this state.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
+        if isinstance(board, int):
+            board = int2board(board, self.board_shape)
 
         # Get SBSA corresponding to this player as
         # well as the opponent for the entire board.
@@ -792,7 +945,7 @@ class WorldCon4(World):
         """
         # For player 1
         if is_player1:
-            return [board2int(np.full(self.board.shape, -1))] # Empty board.
+            return [board2int(np.full(self.board_shape, -1, dtype=np.int8))] # Empty board.
         
         # For player 2
         # Valid start state would be an empty board
@@ -800,9 +953,9 @@ class WorldCon4(World):
         # bottommost rows.
         else:
             start_states = []
-            row_idx = self.board.shape[0]-1
-            for col_idx in range(self.board.shape[1]):
-                board = np.full(self.board.shape, -1)
+            row_idx = self.board_shape[0]-1
+            for col_idx in range(self.board_shape[1]):
+                board = np.full(self.board_shape, -1, dtype=np.int8)
                 board[row_idx, col_idx] = 0
                 start_states.append(board2int(board))
             return start_states
\ No newline at end of file
@@ -18,8 +18,25 @@ class OutputHandler:
         """
         self.folders = {'logs': logs_folder, 'csv': csv_folder}
         for dst in self.folders.values():
-            if not os.path.exists(dst):
-                os.makedirs(dst)
+            os.makedirs(dst, exist_ok=True)
+        # Log files that have been opened so far (path => file)
+        # are kept open so that each line logged does not
+        # open and close the file again.
+        self.log_files = {}
+        # When this is a list, strings to be logged are
+        # collected into it as (filename, string) pairs
+        # instead of being written into log files.
+        self.log_buffer = None
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the state of this handler to be pickled
+        (e.g. when sent to worker processes) without 
+        open log files, which each process opens itself.
+        """
+        state = self.__dict__.copy()
+        state['log_files'] = {}
+        return state
 
     def print_start_status(self, 
         world_type:str, 
@@ -129,9 +146,25 @@ class OutputHandler:
         Adds any string to the log file 
         with an added new line at the start.
         """
+        if self.log_buffer is not None:
+            self.log_buffer.append((filename, out_str))
+            return
         dst = f"{self.folders['logs']}/{filename}.log"
-        with open(dst, 'a') as f:
-            f.write("\n"+out_str)
+        f = self.log_files.get(dst)
+        if f is None:
+            # Line buffered such that logs are written out
+            # as they come even if the file is never closed.
+            f = open(dst, 'a', buffering=1)
+            self.log_files[dst] = f
+        f.write("\n"+out_str)
+
+    def close_logs(self):
+        """
+        Closes all log files that are open.
+        """
+        for f in self.log_files.values():
+            f.close()
+        self.log_files = {}
 
     def append_to_csv(self, 
         world_type:str, player1:str, player2:str, outcome:int,
@@ -143,6 +176,29 @@ class OutputHandler:
         """
         Saves metrics into a file.
         """
+        self.append_rows_to_csv(
+            world_type=world_type, 
+            rows=[(
+                world_type, player1, player2, outcome,
+                avg_milliseconds_per_move_player1,
+                avg_milliseconds_per_move_player2,
+                num_moves, session_id, session_timestamp,
+                milliseconds, game_num
+            )],
+            filename=filename
+        )
+
+    def append_rows_to_csv(self, 
+        world_type:str, rows:list, filename:str=None
+    ):
+        """
+        Saves metrics of many games into a file at once.
+        @param world_type: Type of the world (ttt / con4).
+        @param rows: List of tuples with values in the order
+                     of columns (see append_to_csv(...)).
+        @param filename: Name of the CSV file (world type
+                         by default).
+        """
         if filename is None:
             filename = world_type
         
@@ -156,13 +212,10 @@ class OutputHandler:
                     + "num_moves,session_id,session_timestamp,"
                     + "milliseconds,game_num\n"
                 )
-        to_save = (
-            f"{world_type},{player1},{player2},{outcome},"
-            + f"{avg_milliseconds_per_move_player1},"
-            + f"{avg_milliseconds_per_move_player2},"
-            + f"{num_moves},{session_id},"
-            + f"{session_timestamp},{milliseconds},{game_num}\n"
+        to_save = "".join(
+            ",".join(str(val) for val in row) + "\n"
+            for row in rows
         )
 
         with open(dst, "a") as f:
-            f.write(to_save)
\ No newline at end of file
+            f.write(to_save)
@@ -8,6 +8,10 @@ class Player:
     This class defines a game player.
     """
 
+    # Attributes are stored in fixed slots instead
+    # of a per instance dictionary.
+    __slots__ = ('symbol', 'strategy', 'is_player1')
+
     def __init__(self, 
         symbol:str, 
         strategy:Strategy, 
@@ -31,12 +35,17 @@ class Player:
         """ Returns a string representing this player. """
         return f"{self.symbol}_{self.strategy.name}"
     
-    def get_move(self, board:np.ndarray):
+    def get_move(self, board:np.ndarray, board_int:int=None):
         """
         Given current perspective of this player,
         makes a move as per configured strategy.
+        @param board: Game board from this player's perspective.
+        @param board_int: The same board as an integer if known
+                          so that strategies that search over 
+                          board integers need not encode it.
         """
         return self.strategy.get_move(
             board=board, 
-            is_player1=self.is_player1
+            is_player1=self.is_player1,
+            board_int=board_int
         )
\ No newline at end of file
@@ -138,6 +138,11 @@ if __name__ == "__main__":
         is_player1=False
     )
 
+    # Boards seen while learning are not needed anymore, so
+    # the world's transposition tables are emptied before
+    # the world is used for anything else (e.g. play(...)).
+    world.clear_tt()
+
     total_minutes = (
         out_learn_p1['milliseconds'] +
         out_learn_p2['milliseconds']
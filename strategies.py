@@ -20,6 +20,11 @@ class Strategy:
     This object defines what a 
     game strategy should comprise.
     """
+
+    # Whether moves are read from the terminal, 
+    # which only the main process can do.
+    is_interactive = False
+
     def __init__(self):
         """ Constructor. """
         self.name = type(self).__name__
@@ -33,6 +38,8 @@ class Strategy:
         @param board: Game board from the perspective
                       of the player who is to make the
                       move.
+        @param board_int (optional): The same board as an
+                                     integer (see board2int(...)).
         @return: Action position.
         """
         raise Exception('Not implemented!')
@@ -266,6 +273,8 @@ class StrategyManualTTT(Strategy):
     An agent that embodies a human user.
     """
 
+    is_interactive = True
+
     @track_time
     def get_move(self, *args, **kwargs) -> tuple:
         """ 
@@ -285,6 +294,8 @@ class StrategyManualCon4(Strategy):
     An agent that embodies a human user.
     """
 
+    is_interactive = True
+
     @track_time
     def get_move(self, *args, **kwargs) -> tuple:
         """ 
@@ -420,10 +431,11 @@ class StrategyMiniMax(Strategy):
         self.alpha_beta = alpha_beta
 
     def minimax(self, 
-        board:np.ndarray, 
+        board:int, 
         is_max_player:bool,
         actions:list,
         is_player1:bool,
+        board_shape:tuple,
         depth:float=None, 
         alpha_beta:list=None
     ) -> dict:
@@ -432,7 +444,8 @@ class StrategyMiniMax(Strategy):
         action (action that results in maximization of this
         player's reward and minimization of the opposing player's
         reward).
-        @param board: Game board from the perspective of this player.
+        @param board: Game board from the perspective of this player
+                      as an integer.
         @param is_max_player: True if this move is that of the 
                               maximizing player and false if it
                               is that of the minimizing player.
@@ -451,6 +464,7 @@ class StrategyMiniMax(Strategy):
                            that no alpha beta pruning shall be done.
         @param is_player1: True if this is player 1 and 
                            false otherwise.
+        @param board_shape: Shape of the game board.
         @return: Returns a tuple wherein the first element is the 
                  value of the next best state and the second element
                  is the position wherein to place this player's symbol
@@ -469,7 +483,7 @@ class StrategyMiniMax(Strategy):
             # evaluating, this must be switched
             # over into my perspective.
             if not is_max_player:
-                board = switch_player_perspective(board)
+                board = switch_player_perspective_int(board, board_shape)
 
             static_val = self.state_eval(
                 board=board, 
@@ -484,15 +498,18 @@ class StrategyMiniMax(Strategy):
                 board = board,
                 is_player1 = is_player1
             ):
-                next_state = int2board(next_state_int_action[0], board.shape) # my perspective
+                next_state = next_state_int_action[0] # my perspective
                 action = next_state_int_action[1] # my move
                 out = self.minimax(
-                    board = switch_player_perspective(next_state), # opponent's perspective
+                    board = switch_player_perspective_int(
+                        next_state, board_shape
+                    ), # opponent's perspective
                     is_max_player = False, # The minimizing player (opponent) goes next.
                     actions = actions+[action],
                     depth = depth-1 if depth is not None else None,
                     alpha_beta = None if alpha_beta is None else alpha_beta.copy(),
-                    is_player1 = is_player1 # does not change
+                    is_player1 = is_player1, # does not change
+                    board_shape = board_shape
                 )
                 if out['val'] > max_out['val']:
                     max_out = out
@@ -514,15 +531,18 @@ class StrategyMiniMax(Strategy):
                 board = board,
                 is_player1 = not is_player1
             ):
-                next_state = int2board(next_state_int_action[0], board.shape) # opponent's perspective
+                next_state = next_state_int_action[0] # opponent's perspective
                 action = next_state_int_action[1] # opponent's move
                 out = self.minimax(
-                    board = switch_player_perspective(next_state), # my perspective
+                    board = switch_player_perspective_int(
+                        next_state, board_shape
+                    ), # my perspective
                     is_max_player = True, # The maximizing player (me) goes next.
                     actions = actions+[action],
                     depth = depth-1 if depth is not None else None,
                     alpha_beta = None if alpha_beta is None else alpha_beta.copy(),
-                    is_player1 = is_player1 # does not change
+                    is_player1 = is_player1, # does not change
+                    board_shape = board_shape
                 )
                 if out['val'] < min_out['val']:
                     min_out = out
@@ -539,7 +559,10 @@ class StrategyMiniMax(Strategy):
             return min_out
     
     @track_time
-    def get_move(self, board:np.ndarray, is_player1:bool, *args, **kwargs) -> tuple:
+    def get_move(self, 
+        board:np.ndarray, is_player1:bool, board_int:int=None, 
+        *args, **kwargs
+    ) -> tuple:
         """ 
         Give a board position returns a
         position on the board where the player
@@ -549,11 +572,16 @@ class StrategyMiniMax(Strategy):
                       move.
         @param is_player1: True if this is player 1 and 
                            false otherwise.
+        @param board_int: The same board as an integer. It
+                          is encoded from the board if not given.
         @return: Action position.
         """
+        if board_int is None:
+            board_int = board2int(board)
         out = self.minimax( # This player is always the maximizing player.
-            board=board, depth=self.depth, actions=[], 
+            board=board_int, depth=self.depth, actions=[], 
             is_player1=is_player1, is_max_player=True,
+            board_shape=board.shape,
             alpha_beta=[float('-inf'), float('inf')] if self.alpha_beta else None,
         )
 
@@ -880,9 +908,7 @@ class StrategyTabQLearning(Strategy):
                     r_s_a = self.get_reward(s, a)
                 else: # player_num == 2
                     r_s_a = self.get_reward(
-                        switch_player_perspective(
-                            int2board(s, self.board_shape)
-                        ), a
+                        switch_player_perspective_int(s, self.board_shape), a
                     )
                 if not s in self.q_tab[player_num]:
                     self.q_tab[player_num][s] = {}
@@ -945,7 +971,10 @@ class StrategyTabQLearning(Strategy):
         print(f"Saved Q table at {dst}.")
 
     @track_time
-    def get_move(self, board:np.ndarray, is_player1:bool, *args, **kwargs) -> tuple:
+    def get_move(self, 
+        board:np.ndarray, is_player1:bool, board_int:int=None, 
+        *args, **kwargs
+    ) -> tuple:
         """ 
         Give a board position returns a
         position on the board where the player
@@ -955,9 +984,12 @@ class StrategyTabQLearning(Strategy):
                       move.
         @param is_player1: True if this is player 1 and 
                            false otherwise.
+        @param board_int: The same board as an integer. It
+                          is encoded from the board if not given.
         @return: Action position.
         """
-        board_int = board2int(board) # Integer of the board.
+        if board_int is None:
+            board_int = board2int(board)
         player_num = 1 if is_player1 else 2
 
         if player_num == 2:
@@ -0,0 +1,6 @@
+### This file makes modules at the root of the
+### repository importable from tests.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
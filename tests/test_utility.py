@@ -0,0 +1,43 @@
+### This file tests common functions in utility.py.
+import numpy as np
+from utility import state_num_to_str
+
+def test_state_num_to_str_maps_symbols():
+    """
+    Numbers -1, 0 and 1 are replaced by their symbols
+    and numbers without one are kept as strings.
+    """
+    sym_map = {-1: "#", 0: "O", 1: "X"}
+    state_num = np.array([[-1, 0, 1], [1, 1, -1]], dtype=np.int8)
+    assert state_num_to_str(state_num, sym_map) == [
+        ["#", "O", "X"], ["X", "X", "#"]
+    ]
+    assert state_num_to_str(state_num, {1: "X"}) == [
+        ["-1", "0", "X"], ["X", "X", "-1"]
+    ]
+
+def test_state_num_to_str_keeps_unmapped_numbers():
+    """
+    Numbers outside of {-1, 0, 1} are kept as strings
+    unless mapped to a symbol.
+    """
+    sym_map = {-1: "#", 0: "O", 1: "X"}
+    state_num = np.array([[-2, 0, 2], [1, 3, -1]])
+    assert state_num_to_str(state_num, sym_map) == [
+        ["-2", "O", "2"], ["X", "3", "#"]
+    ]
+    assert state_num_to_str(state_num, {2: "Z"}) == [
+        ["-2", "0", "Z"], ["1", "3", "-1"]
+    ]
+
+def test_state_num_to_str_other_inputs():
+    """
+    Lists of strings are returned as they are and 
+    non integer boards are represented by their strings.
+    """
+    sym_map = {-1: "#", 0: "O", 1: "X"}
+    assert state_num_to_str([["X", "#"]], sym_map) == [["X", "#"]]
+    assert state_num_to_str([[-1, 0, 1]], sym_map) == [["#", "O", "X"]]
+    assert state_num_to_str(np.array([[-1.0, 1.5]]), sym_map) == [
+        ["-1.0", "1.5"]
+    ]
@@ -0,0 +1,105 @@
+### This file tests playing games in a world.
+import re
+import csv
+import pytest
+from player import Player
+from tic_tac_toe import WorldTTT
+from strategies import StrategyRandomTTT
+from strategies import StrategyManualTTT
+from output_handler import OutputHandler
+
+def get_world(folder:str, strategy1=None) -> WorldTTT:
+    """
+    Returns a tic tac toe world with random players
+    whose output is saved into given folder.
+    @param folder: Folder for logs and CSV files.
+    @param strategy1: Strategy of player 1 (random by default).
+    @return: World with configured players.
+    """
+    world = WorldTTT(
+        player1sym='X', player2sym='O',
+        output_handler=OutputHandler(
+            logs_folder=str(folder), csv_folder=str(folder)
+        )
+    )
+    world.configure_players(
+        player1=Player(
+            symbol='X', is_player1=True,
+            strategy=(
+                StrategyRandomTTT() if strategy1 is None else strategy1
+            )
+        ),
+        player2=Player(
+            symbol='O', strategy=StrategyRandomTTT(), is_player1=False
+        )
+    )
+    return world
+
+def test_play_parallel_logs_games_contiguously(tmp_path):
+    """
+    Each game's block in the log of a session played by 
+    many workers must be whole and in game order.
+    """
+    world = get_world(tmp_path)
+    num_games = 8
+    world.play(id="parallel", out_config={
+        "log": {"moves": True, "status": True, "metrics": ['game']},
+    }, num_games=num_games, num_workers=2)
+
+    log_paths = list(tmp_path.glob("*.log"))
+    assert len(log_paths) == 1
+    log_str = log_paths[0].read_text()
+
+    # Lines that start and end each game's block.
+    markers = re.findall(r"(Playing Game|Metrics).*?Game '(\d+)'", log_str)
+    expected = []
+    for game_num in range(1, num_games + 1):
+        expected.append(("Playing Game", str(game_num)))
+        expected.append(("Metrics", str(game_num)))
+    assert markers == expected
+
+    # No lines of any other game are logged in between
+    # the start and metrics of a game.
+    blocks = log_str.split("\nPlaying Game: ")[1:]
+    assert len(blocks) == num_games
+    for block in blocks:
+        assert block.count("Metrics (") == 1
+
+def test_play_parallel_matches_sequential(tmp_path):
+    """
+    A seeded session has the same outcomes and CSV rows
+    (apart from times) whether or not workers play it.
+    """
+    num_games = 12
+    outcomes = {}
+    rows = {}
+    for num_workers in (1, 3):
+        folder = tmp_path / str(num_workers)
+        outcomes[num_workers] = get_world(folder).play(
+            id="seeded", out_config={"csv": {}},
+            num_games=num_games, num_workers=num_workers, seed=7
+        )
+        with open(folder / "ttt.csv") as f:
+            rows[num_workers] = [
+                (
+                    row['outcome'], row['num_moves'], 
+                    row['player1'], row['player2'], row['game_num']
+                ) for row in csv.DictReader(f)
+            ]
+    assert len(rows[1]) == num_games
+    assert rows[1] == rows[3]
+    # Many games so that outcomes are not all the same.
+    assert len(set(row[0] for row in rows[1])) > 1
+    for key in ('num_draws', 'num_games'):
+        assert outcomes[1][key] == outcomes[3][key]
+    for sym in ('X', 'O'):
+        for key in ('won', 'num_moves'):
+            assert outcomes[1][sym][key] == outcomes[3][sym][key]
+
+def test_play_parallel_rejects_manual_players(tmp_path):
+    """
+    Manual players cannot play in workers.
+    """
+    world = get_world(tmp_path, strategy1=StrategyManualTTT())
+    with pytest.raises(Exception, match="manual"):
+        world.play(id="manual", num_games=2, num_workers=2)
@@ -3,9 +3,9 @@
 import random
 import numpy as np
 from world import World
-from utility import int2board
 from utility import board2int
 from utility import print_debug
+from utility import get_cells_mask
 from utility import get_row_col_diags
 from output_handler import OutputHandler
 
@@ -16,32 +16,44 @@ class WorldTTT(World):
     game board and game mechanics.
     """
 
+    __slots__ = ()
+
     def __init__(self,
         player1sym:str, 
         player2sym:str, 
-        output_handler:OutputHandler
+        output_handler:OutputHandler,
+        tt_max_size:int=1<<20,
+        tt_next_max_size:int=1<<16
     ):
-        """ Constructor. """
+        """ 
+        Constructor. 
+        @param tt_max_size: Max. no. of entries that each
+                            transposition table can hold
+                            (see World.__init__(...)).
+        @param tt_next_max_size: Max. no. of entries of the
+                                 next states table (see
+                                 World.__init__(...)).
+        """
         super().__init__(
             type="ttt",
             board_size=(3,3), 
             player1sym=player1sym, 
             player2sym=player2sym,
             output_handler=output_handler,
+            tt_max_size=tt_max_size,
+            tt_next_max_size=tt_next_max_size,
+            win_length=3
         )
 
-    def __get_set_val(self, s:list):
+    def __get_set_val(self, count_me:int, count_opp:int):
         """ 
-        Given a set of values representing either
-        a row, column or diagonal. This function
+        Given the no. of pieces of each player in
+        either a row, column or diagonal. This function
         returns the value (goodness) of that row.
-        @param s: Set of values in a column, row
-                  diagonal or anti-diagonal.
-        @param sym: Symbol of this player.
+        @param count_me: Spots occupied by "me".
+        @param count_opp: Spots occupied by my "opponent".
         """
-        count_me = s.count(1) # Spots occupied by "me".
-        count_opp = s.count(0) # Spots occupied by my "opponent".
-        count_free = s.count(-1) # Free spots.
+        count_free = 3 - count_me - count_opp # Free spots.
         count_ideal_free = 3 - count_me
 
         # print_debug(f'{s}, {count_me}, {count_opp}, {count_free}, {count_ideal_free}')
@@ -70,8 +82,8 @@ class WorldTTT(World):
         player_num = 1 if is_player1 else 2
         return [
             ((r, c), player_num)
-            for r in range(self.board.shape[0])
-            for c in range(self.board.shape[1])
+            for r in range(self.board_shape[0])
+            for c in range(self.board_shape[1])
         ]
 
     def is_valid(self, num_board:np.ndarray, is_player1:bool) -> bool:
@@ -84,6 +96,9 @@ class WorldTTT(World):
             @param: Returns false if this is an invalid state and
                     true otherwise.
         """
+        if isinstance(num_board, int):
+            return self.__is_valid_int(num_board, is_player1)
+
         sym_p1 = 1 if is_player1 else 0
         sym_p2 = 1 - sym_p1
 
@@ -166,62 +181,61 @@ class WorldTTT(World):
         # of the above rules.
         return True
 
-    def is_winner(self, num_board:np.ndarray) -> int:
-        """ 
-        Given a board, return if this player has won.
-        @param num_board: Board containing numbers from this
-                        player's perspective.
-        @param: Returns 1 if this player has won, -1 if the
-                the opponent has one and 0 if no one has won.
+    def get_win_mask_groups(self) -> list:
         """
-        # Check row, column and diagonal from
-        # center position.
-        row_col_diags = get_row_col_diags(
-            board = num_board,
+        Returns masks of the row, column and diagonal 
+        lines in the order that they were originally 
+        checked in, each line in its own group with this
+        player's pieces checked first.
+        @return: List of 2 tuples of the order of player
+                 symbols to check and line masks.
+        """
+        lines = list(get_row_col_diags(
+            board = self.board,
             row_idx = 1, col_idx = 1
-        )
-        for v in row_col_diags.values():
-            v = v.values()
-            v_me = [1 if n == 1 else 0 for n in v]
-            if sum(v_me) == 3:
-                return 1
-            v_opp = [1 if n == 0 else 0 for n in v]
-            if sum(v_opp) == 3:
-                return -1
-
-        # Check row, column and diagonal from
-        # the top left position.
-        row_col = get_row_col_diags(
-            board = num_board,
-            row_idx = 0, col_idx = 0,
-            directions=['row', 'col']
-        )
-        for v in row_col.values():
-            v = v.values()
-            v_me = [1 if n == 1 else 0 for n in v]
-            if sum(v_me) == 3:
-                return 1
-            v_opp = [1 if n == 0 else 0 for n in v]
-            if sum(v_opp) == 3:
-                return -1
+        ).values())
+        for pos in [0, 2]:
+            lines += get_row_col_diags(
+                board = self.board,
+                row_idx = pos, col_idx = pos,
+                directions=['row', 'col']
+            ).values()
+        return [
+            ((1, 0), (get_cells_mask(line.keys(), self.board_shape),))
+            for line in lines
+        ]
 
-        # Check row, column and diagonal from
-        # the bottom right position.
-        row_col = get_row_col_diags(
-            board = num_board,
-            row_idx = 2, col_idx = 2,
-            directions=['row', 'col']
+    def __is_valid_int(self, board_int:int, is_player1:bool) -> bool:
+        """
+        Checks the same rules as is_valid(...) using 
+        bit operations on a board integer.
+        @param board_int: Board from this player's 
+                          perspective as an integer.
+        @param is_player1: If true, then this is the first player.
+                           Else, it is the second player.
+        @return: False if this is an invalid state and
+                 true otherwise.
+        """
+        spaces = board_int & self.spaces_mask
+        pieces_me = board_int >> self.num_cells
+        pieces_opp = spaces & ~pieces_me
+        pieces_p1, pieces_p2 = (
+            (pieces_me, pieces_opp) if is_player1
+            else (pieces_opp, pieces_me)
         )
-        for v in row_col.values():
-            v = v.values()
-            v_me = [1 if n == 1 else 0 for n in v]
-            if sum(v_me) == 3:
-                return 1
-            v_opp = [1 if n == 0 else 0 for n in v]
-            if sum(v_opp) == 3:
-                return -1        
-        
-        return 0
+        count_p1 = pieces_p1.bit_count()
+        count_p2 = pieces_p2.bit_count()
+        if count_p1 != count_p2 and count_p1-1 != count_p2:
+            return False
+        win_p1 = self.has_line(pieces_p1)
+        win_p2 = self.has_line(pieces_p2)
+        if win_p1 and win_p2:
+            return False
+        if win_p1 and count_p1-1 != count_p2: 
+            return False
+        if win_p2 and count_p1 != count_p2: 
+            return False
+        return True
 
     def is_legal(self, num_board:np.ndarray, action:tuple) -> bool:
         """
@@ -236,7 +250,7 @@ class WorldTTT(World):
         """
 
         # Player can only be either 1 or 2.
-        if not action[1] in [1, 2]:
+        if action[1] != 1 and action[1] != 2:
             return False
 
         # Position at which to place piece.
@@ -244,14 +258,16 @@ class WorldTTT(World):
 
         # Action tries to put piece in a non-existent
         # column => illegal action.
-        if (
-            pos[0] < 0 or pos[0] >= self.board.shape[0] or
-            pos[1] < 0 or pos[1] >= self.board.shape[1]
-        ): return False
+        num_rows, num_cols = self.board_shape
+        if not (0 <= pos[0] < num_rows and 0 <= pos[1] < num_cols): 
+            return False
        
         # Action tries to input a piece into a 
         # column that is already full => illegal action.
-        if num_board[pos] != -1:
+        if isinstance(num_board, int):
+            if num_board & self.cell_bits[pos[0] * num_cols + pos[1]]:
+                return False
+        elif num_board[pos] != -1:
             return False
         
         # If above conditions are not met,
@@ -275,25 +291,107 @@ class WorldTTT(World):
         @return: Integer of next board from the perspective
                  of the player that took the action, or -1.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
+        if isinstance(board, int):
+            return self.get_next_state_int(board, action)
+
+        next_state = self.get_next_board(board, action)
+        if next_state is None:
+            return -1
+        return board2int(next_state)
+
+    def has_line(self, pieces:int) -> bool:
+        """
+        Returns whether given pieces fill any line 
+        that a player can win by filling.
+        @param pieces: Bits of a player's pieces in 
+                       the spaces half of board integers.
+        @return: True if a line is filled and false otherwise.
+        """
+        # With only 8 lines on the board, testing each
+        # mask is quicker than shifting (see World.has_line(...)).
+        for mask in self.win_line_masks:
+            if pieces & mask == mask:
+                return True
+        return False
+
+    def get_legal_bit(self, action:tuple) -> int:
+        """
+        Returns the bit of the cell that must be free
+        for given action to be legal on a board.
+        @param action: A possible action in the format =
+                       ((row index, column index), player number)
+        @return: Bit of the cell in the spaces half of 
+                 board integers.
+        """
+        pos = action[0]
+        return self.cell_bits[pos[0] * self.board_shape[1] + pos[1]]
 
+    def get_move_bit(self, board_int:int, action:tuple) -> int:
+        """
+        Returns the bit of the cell that a piece is placed
+        in upon executing given legal action on given board.
+        @param board_int: Game board as an integer.
+        @param action: The action to take in the format =
+                       ((row index, column index), player number)
+        @return: Bit of the cell in the spaces half of 
+                 board integers.
+        """
+        pos = action[0]
+        return self.cell_bits[pos[0] * self.board_shape[1] + pos[1]]
+
+    def get_next_board(self, board:np.ndarray, action:tuple) -> np.ndarray:
+        """
+        Given a game board containing numbers
+        as per a given player's perspective,
+        and an action to take, returns the
+        resulting next game board. None is
+        returned if the action is illegal or
+        results in an invalid state.
+        @param board: Current game board from the
+                      perspective of the player who
+                      is going to execute the given action.
+                      It is assumed that this state is valid.
+        @param action: The action to take.
+        @return: Next board from the perspective of
+                 the player that took the action, or None.
+        """
         # If this action is illegal,
-        # then return -1.
+        # then return None.
         if not self.is_legal(board, action):
-            return -1
+            return None
         
         # If the resulting state is invalid,
-        # then return -1.
+        # then return None.
         is_player1 = (action[1]==1)
         next_state = board.copy()
         next_state[action[0]] = 1
         if not self.is_valid(next_state, is_player1):
-            return -1
+            return None
         
-        return board2int(next_state)
+        return next_state
 
-    def state_eval(self, board, is_my_turn_next:bool):
+    def get_next_boards(self, board:np.ndarray, is_player1:bool) -> tuple:
+        """
+        Returns boards that result from executing each 
+        legal action on given board (valid or not).
+        @param board: Game board from the perspective of
+                      the player who executes the actions.
+        @param is_player1: Whether player 1 is making the move.
+        @return: 2 tuple with an array of next boards of shape
+                 (no. of legal actions, rows, columns) and 
+                 the list of actions that lead to them.
+        """
+        # Actions are in row major order, so the flat
+        # index of each free position is that of its action.
+        free_idxs = np.flatnonzero(board == -1)
+        actions = self.actions[is_player1]
+        next_boards = np.repeat(board[None], len(free_idxs), axis=0)
+        next_boards.reshape(len(free_idxs), board.size)[
+            np.arange(len(free_idxs)), free_idxs
+        ] = 1
+        return next_boards, [actions[i] for i in free_idxs.tolist()]
+
+    def compute_state_eval(self, board, is_my_turn_next:bool):
         """
         Computes the value of given state. 
         @param board: Game board from perspective of a player.
@@ -301,22 +399,19 @@ class WorldTTT(World):
                                 player's and false otherwise.
         @return: Value of this state.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
+        board_int = board if isinstance(board, int) else board2int(board)
+        pieces_me = board_int >> self.num_cells
+        pieces_opp = board_int & self.spaces_mask & ~pieces_me
     
-        # Compute value of each of the following:
-        # [row0, row1, row2, diag, col0, col1, col2, anti-diag]  
-        vals = [] 
-        # Row values.
-        for row in board: 
-            vals.append(self.__get_set_val(row.tolist()))
-        # Diagonal value.
-        vals.append(self.__get_set_val(board.diagonal().tolist()))
-        # Column values.
-        for col in board.T: 
-            vals.append(self.__get_set_val(col.tolist()))
-        # Anti diagonal value.
-        vals.append(self.__get_set_val(np.fliplr(board).diagonal().tolist()))
+        # Compute value of each row, column, diagonal 
+        # and anti-diagonal from the no. of pieces of
+        # each player in it (popcount of its mask).
+        vals = [
+            self.__get_set_val(
+                (pieces_me & mask).bit_count(), 
+                (pieces_opp & mask).bit_count()
+            ) for mask in self.win_line_masks
+        ]
 
         # Compute state value.
         # If I have won => great
@@ -370,14 +465,14 @@ class WorldTTT(World):
         """
         # For player 1
         if is_player1:
-            return [board2int(np.full(self.board.shape, -1))] # Empty board.
+            return [board2int(np.full(self.board_shape, -1, dtype=np.int8))] # Empty board.
         
         # For player 2
         else:
             start_states = []
-            for row_idx in range(self.board.shape[0]):
-                for col_idx in range(self.board.shape[1]):
-                    board = np.full(self.board.shape, -1)
+            for row_idx in range(self.board_shape[0]):
+                for col_idx in range(self.board_shape[1]):
+                    board = np.full(self.board_shape, -1, dtype=np.int8)
                     board[row_idx, col_idx] = 0
                     start_states.append(board2int(board))
             return start_states
\ No newline at end of file
@@ -4,8 +4,22 @@ import random
 import traceback
 import numpy as np
 from datetime import datetime
+from math import prod
+from functools import lru_cache
 from typing import Callable, Dict
 
+# Maps each player symbol to that of its opponent.
+OPPOSITE_SYMBOL = {"X": "O", "O": "X", "R": "Y", "Y": "R"}
+
+# Max. no. of boards whose integer encodings are memoized.
+BOARD_CACHE_SIZE = 1 << 18
+
+# Map each byte of an int8 board to the binary digit
+# of its cell in the symbols half ("1" => piece 1) and
+# the spaces half ("0" => -1, free space) of board integers.
+SYMBOL_DIGITS = bytes(ord("1") if b == 1 else ord("0") for b in range(256))
+SPACE_DIGITS = bytes(ord("0") if b == 0xff else ord("1") for b in range(256))
+
 def get_datetime_id(dt:datetime=None) -> str:
     """
     Converts a given datetime object into 
@@ -34,20 +48,21 @@ def track_time(f:Callable):
     @return: Execution time in milliseconds.
     """
     def wrapper(*args, **kwargs):
-        to_return = {'f_out': None, 'milliseconds': 0}
-        time_start = time.time() * 1000 # keep track of time
+        res = None
+        # Monotonic, high resolution clock (keeps track of time).
+        time_start = time.perf_counter_ns()
         try:
             try:
                 res = f(*args, **kwargs)
-                to_return['f_out'] = res 
             except Exception as e:
                 print(f"Exception! {f.__name__}(...): {e}")
                 print(traceback.format_exc())
         except KeyboardInterrupt:
             print(f"Keyboard Interrupt! {f.__name__}(...)")
-        finally:
-            to_return['milliseconds'] = time.time() * 1000 - time_start 
-        return to_return
+        return {
+            'f_out': res,
+            'milliseconds': (time.perf_counter_ns() - time_start) / 1e6
+        }
     return wrapper
 
 def print_debug(to_print):
@@ -83,11 +98,28 @@ def state_str_to_num(state_str:np.ndarray, sym_map:Dict[str, int]) -> list:
     @param sym_map: A mapping of string symbol to
                     desired number.
     """
+    # A state that already has numbers needs no replacement.
+    if np.issubdtype(state_str.dtype, np.integer):
+        return state_str.tolist()
     for k, v in sym_map.items():
         state_str[state_str == k] = str(v)
     state_num = state_str.astype(int)
     return state_num.tolist()
 
+@lru_cache(maxsize=None)
+def get_sym_lut(sym_items:tuple) -> np.ndarray:
+    """
+    Returns a look up table of the string symbols
+    for numbers -1, 0 and 1 (in that order) as per
+    given mapping. Numbers that are not mapped are
+    represented by their own string.
+    @param sym_items: Sorted tuple of (number, symbol)
+                      pairs of a number to symbol mapping.
+    @return: Look up table as a numpy array.
+    """
+    sym_map = dict(sym_items)
+    return np.array([sym_map.get(n, str(n)) for n in (-1, 0, 1)])
+
 def state_num_to_str(state_num:np.ndarray, sym_map:Dict[int, str]) -> list:
     """
     Given a state with symbols as numbers,
@@ -97,22 +129,37 @@ def state_num_to_str(state_num:np.ndarray, sym_map:Dict[int, str]) -> list:
     @param sym_map: A mapping of integer to 
                     desired string symbol.
     """
-    state_str = state_num.astype(str)
-    for k, v in sym_map.items():
-        state_str[state_str == str(k)] = v
-    return state_str.tolist()
+    state_num = np.asarray(state_num)
+    # A state that already has strings needs no replacement.
+    if np.issubdtype(state_num.dtype, np.str_):
+        return state_num.tolist()
+    # Only integers in {-1, 0, 1} are in the look up table.
+    # Others (and any non integer numbers) have each mapped 
+    # number replaced one by one and the rest represented 
+    # by their own string.
+    if not np.issubdtype(state_num.dtype, np.integer) or (
+        state_num.size > 0 
+        and (state_num.min() < -1 or state_num.max() > 1)
+    ):
+        state_str = state_num.astype(str)
+        for k, v in sym_map.items():
+            state_str[state_str == str(k)] = v
+        return state_str.tolist()
+    # Each number n in {-1, 0, 1} is looked up
+    # at index n + 1 of the symbol look up table.
+    sym_lut = get_sym_lut(tuple(sorted(sym_map.items())))
+    return sym_lut[state_num + 1].tolist()
    
 def get_opposite_symbol(sym:str) -> str:
-    """ 
-    Given a symbol, get's that of the opponent. 
+    """
+    Given a symbol, get's that of the opponent.
     @param sym: This player's symbol.
     @return: Opponent's symbol.
     """
-    if sym == "X": return "O"
-    elif sym == "O": return "X"
-    elif sym == 'R': return "Y"
-    elif sym == "Y": return "R"
-    raise Exception(f"Invalid symbol '{sym}'.")
+    try:
+        return OPPOSITE_SYMBOL[sym]
+    except KeyError:
+        raise Exception(f"Invalid symbol '{sym}'.")
 
 def get_player_perspective(board:np.ndarray, sym:str):
     """
@@ -126,11 +173,11 @@ def get_player_perspective(board:np.ndarray, sym:str):
     """
     sym_me = sym
     sym_opponent = get_opposite_symbol(sym)
-    char_to_int = {sym_me: 1, sym_opponent: 0, "#": -1}
-    player_view = np.array([
-        [char_to_int[char] for char in row] 
-        for row in board
-    ])
+    board = np.asarray(board)
+    player_view = np.where(
+        board == sym_me, 1,
+        np.where(board == sym_opponent, 0, -1)
+    ).astype(np.int8)
     return player_view
 
 def get_world_perspective(
@@ -151,22 +198,27 @@ def get_world_perspective(
     """
     sym_me = sym
     sym_opponent = get_opposite_symbol(sym)
-    int_to_char = {1: sym_me, 0: sym_opponent, -1:"#"}
-    world_view = np.array([
-        [int_to_char[i] for i in row] 
-        for row in num_board
-    ])
+    world_view = np.where(
+        num_board == 1, sym_me,
+        np.where(num_board == 0, sym_opponent, "#")
+    )
     return world_view
 
-def switch_player_perspective(board_num:np.ndarray) -> np.ndarray:
+def switch_player_perspective(
+    board_num:np.ndarray, inplace:bool=False
+) -> np.ndarray:
     """ 
     Switches the board from perspective of one player 
     to that of the opponent.
-    """
-    board_opp = board_num.copy()
-    board_opp[board_opp == 1] = 2
-    board_opp[board_opp == 0] = 1
-    board_opp[board_opp == 2] = 0
+    @param board_num: Board with numbers from a player's perspective.
+    @param inplace: Whether to switch given board itself
+                    instead of a copy (false by default).
+    @return: Board from the opponent's perspective.
+    """
+    board_opp = board_num if inplace else board_num.copy()
+    # Pieces flip between 1 and 0 as 1 - n
+    # while spaces (-1) are left as they are.
+    np.subtract(1, board_opp, out=board_opp, where=board_opp != -1)
     return board_opp
 
 def switch_player_perspective_int(board_int:int, board_size:tuple) -> int:
@@ -177,11 +229,14 @@ def switch_player_perspective_int(board_int:int, board_size:tuple) -> int:
     @param board_size: Size of encoded board.
     @return: Switched board as an integer.
     """
-    board = int2board(board_int, board_size)
-    board[board == 1] = 2
-    board[board == 0] = 1
-    board[board == 2] = 0
-    return board2int(board)
+    # The upper half of the integer marks cells
+    # with this player's pieces and the lower half
+    # marks occupied cells, so the opponent's pieces 
+    # are those that are occupied but not this player's.
+    num_cells = prod(board_size)
+    spaces = board_int & ((1 << num_cells) - 1)
+    symbols = board_int >> num_cells
+    return ((spaces & ~symbols) << num_cells) | spaces
 
 def get_random_num_board(board_size:tuple) -> np.ndarray:
     """ 
@@ -191,9 +246,11 @@ def get_random_num_board(board_size:tuple) -> np.ndarray:
     @param board_size: Size of the board.
     @return board: Board as numpy array.
     """
-    board_rand = np.random.randint(0, 3, size=board_size)
-    board_rand[board_rand == 2] = -1
-    return board_rand
+    # Sample -1, 0 and 1 directly so that no
+    # second pass to remap values is needed. Boards
+    # are int8 like all others such that board2int(...)
+    # can encode them by translating their bytes.
+    return np.random.randint(-1, 2, size=board_size, dtype=np.int8)
 
 def odd_or_even(number:int) -> int:
     """
@@ -202,7 +259,100 @@ def odd_or_even(number:int) -> int:
     @return: Number 1 if number is odd and 0
              if it is even.
     """
-    return int(number % 2 != 0)
+    return number & 1
+
+def get_win_lines(board_shape:tuple, win_length:int) -> np.ndarray:
+    """
+    Returns all lines of given length along rows, 
+    columns, diagonals and anti-diagonals of a board.
+    @param board_shape: Shape of the board.
+    @param win_length: No. of cells in each line.
+    @return: Array with one row per line that holds 
+             the flat indices of cells in that line.
+    """
+    num_rows, num_cols = board_shape
+    lines = []
+    for row_idx in range(num_rows):
+        for col_idx in range(num_cols):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                row_end = row_idx + d_row * (win_length - 1)
+                col_end = col_idx + d_col * (win_length - 1)
+                if 0 <= row_end < num_rows and 0 <= col_end < num_cols:
+                    lines.append([
+                        (row_idx + d_row * i) * num_cols + col_idx + d_col * i
+                        for i in range(win_length)
+                    ])
+    return np.array(lines)
+
+def get_win_masks(board_shape:tuple, win_length:int) -> np.ndarray:
+    """
+    Returns bit masks of all lines of given length
+    in the bit layout of board integers (see board2int(...)).
+    @param board_shape: Shape of the board (max. 64 cells).
+    @param win_length: No. of cells in each line.
+    @return: Array with one mask per line with bits 
+             set for cells in that line.
+    """
+    num_cells = prod(board_shape)
+    return np.array([
+        sum(1 << (num_cells - 1 - cell_idx) for cell_idx in line)
+        for line in get_win_lines(board_shape, win_length).tolist()
+    ], dtype=np.uint64)
+
+def get_win_line_shifts(board_shape:tuple, win_length:int) -> tuple:
+    """
+    Returns what is needed to find lines of given length 
+    in the bit layout of board integers (see board2int(...))
+    by shifting pieces onto themselves instead of testing 
+    one line mask at a time. Cells of a line are a fixed 
+    no. of bits (stride) apart, so for pieces p, the bit 
+    of a line's lowest cell stays set in p & (p >> stride) 
+    & (p >> 2 * stride) ... only if the line is filled. 
+    Shifting the running result instead of p doubles the
+    covered length with each step. 
+    @param board_shape: Shape of the board.
+    @param win_length: No. of cells in each line.
+    @return: Tuple of 2 tuples, one per stride, wherein the
+             first element is the tuple of shifts to apply
+             one after the other and the second element 
+             is the mask of lowest cells of all lines with
+             this stride.
+    """
+    num_cells = prod(board_shape)
+    # Each shift adds as many cells as are covered so far
+    # until the line length is reached.
+    steps = []
+    covered = 1
+    while covered < win_length:
+        step = min(covered, win_length - covered)
+        steps.append(step)
+        covered += step
+    starts = {} # stride => mask of lowest cells
+    for line in get_win_lines(board_shape, win_length).tolist():
+        stride = line[1] - line[0]
+        starts[stride] = starts.get(stride, 0) | (
+            1 << (num_cells - 1 - line[-1])
+        )
+    return tuple(
+        (tuple(step * stride for step in steps), mask)
+        for stride, mask in starts.items()
+    )
+
+def get_cells_mask(positions, board_shape:tuple) -> int:
+    """
+    Returns a mask with bits set for given positions in
+    the spaces half of board integers (see board2int(...)).
+    Shifting it left by the no. of cells on the board 
+    gives the mask in the symbols half.
+    @param positions: 2 tuple positions on the board.
+    @param board_shape: Shape of the board.
+    @return: Mask of given positions.
+    """
+    num_cells = prod(board_shape)
+    return sum(
+        1 << (num_cells - 1 - (row_idx * board_shape[1] + col_idx))
+        for row_idx, col_idx in positions
+    )
 
 def get_row_col_diags(
     board:np.ndarray, 
@@ -231,48 +381,39 @@ def get_row_col_diags(
     for direction in directions:
         if direction == 'row':
             to_return['row'] = {
-                (row_idx, i): board[row_idx, i]
-                for i in range(board.shape[1])
+                (row_idx, i): val
+                for i, val in enumerate(board[row_idx, :].tolist())
             }
         elif direction == 'col':
             to_return['col'] = {
-                (i, col_idx): board[i, col_idx]
-                for i in range(board.shape[0])
+                (i, col_idx): val
+                for i, val in enumerate(board[:, col_idx].tolist())
             }
         elif direction == 'diag':
-            row_indices = range(
-                max(0, row_idx - min(row_idx, col_idx)), 
-                min(board.shape[0], row_idx + board.shape[1] - col_idx)
-            )
-            col_indices = range(
-                max(0, col_idx - min(row_idx, col_idx)), 
-                min(board.shape[1], col_idx + board.shape[0] - row_idx)
-            )
+            # The diagonal is read as a strided view with
+            # positions following from where it starts.
+            diag = board.diagonal(offset=col_idx-row_idx)
+            start = min(row_idx, col_idx)
+            row_start = row_idx - start
+            col_start = col_idx - start
             to_return['diag'] = {
-                (row_indices[i], col_indices[i]): board[row_indices[i], col_indices[i]] 
-                for i in range(min(len(row_indices), len(col_indices)))
+                (row_start+i, col_start+i): val
+                for i, val in enumerate(diag.tolist())
             }
         else: # direction == 'antidiag'
-            if not 'antidiag' in to_return:
-                to_return['antidiag'] = {}
-            i = row_idx
-            j = col_idx
-            while j >= 0 and i < board.shape[0]:
-                to_return['antidiag'][(i, j)] = board[i, j]
-                i += 1
-                j -= 1
-
-            i = row_idx-1 
-            j = col_idx+1
-            while i >= 0 and j < board.shape[1]:
-                to_return['antidiag'][(i, j)] = board[i, j]
-                i -= 1
-                j += 1
-
-            sorted_keys = sorted(to_return['antidiag'].keys())
+            # The anti-diagonal is the diagonal of the board
+            # flipped left to right. It is walked in order from
+            # its top end, so there is nothing left to sort.
+            col_idx_flipped = board.shape[1] - 1 - col_idx
+            antidiag = np.fliplr(board).diagonal(
+                offset=col_idx_flipped-row_idx
+            )
+            start = min(row_idx, col_idx_flipped)
+            row_start = row_idx - start
+            col_start = col_idx + start
             to_return['antidiag'] = {
-                key: to_return['antidiag'][key] 
-                for key in sorted_keys
+                (row_start+i, col_start-i): val
+                for i, val in enumerate(antidiag.tolist())
             }
     return to_return
 
@@ -293,17 +434,41 @@ def board2int(num_board:np.ndarray) -> int:
                       of a particular player.
     @return: Game board as an integer.
     """
-    spaces = ""
-    symbols = ""
-    for n in num_board.flatten():
-        if n == -1:
-            spaces += "0"
-            symbols += "0"
-        else:
-            spaces += "1"
-            symbols += str(n)
-    bin_str = symbols + spaces
-    return int(bin_str, 2)
+    # Boards are int8 as made by worlds. Any other board
+    # (whose cells are still -1, 0 or 1) is cast to int8.
+    if num_board.dtype != np.int8:
+        num_board = num_board.astype(np.int8)
+    # Each cell of an int8 board is one byte, so the
+    # bytes translate straight into the binary digits
+    # of both halves of the integer.
+    board_bytes = num_board.tobytes()
+    return (
+        int(board_bytes.translate(SYMBOL_DIGITS), 2) << len(board_bytes)
+    ) | int(board_bytes.translate(SPACE_DIGITS), 2)
+
+def board2int_batch(boards:np.ndarray) -> list:
+    """
+    Converts each of a batch of game boards into an
+    integer as described in board2int(...) all at once.
+    @param boards: Game boards from the perspective of a
+                   particular player stacked into an
+                   array of shape (no. of boards, rows, columns).
+    @return: List of game boards as integers.
+    """
+    boards = np.asarray(boards)
+    boards_flat = boards.reshape(
+        boards.shape[0], int(np.prod(boards.shape[1:]))
+    )
+    # Symbol bits followed by space bits for every board.
+    bits = np.concatenate([
+        boards_flat == 1, boards_flat != -1
+    ], axis=1)
+    # Leading zeros are padded so that the bits fill whole
+    # bytes and the integer value of each row is unchanged.
+    num_pad = (-bits.shape[1]) % 8
+    bits = np.pad(bits, ((0, 0), (num_pad, 0)))
+    packed = np.packbits(bits, axis=1)
+    return [int.from_bytes(row.tobytes(), 'big') for row in packed]
 
 def int2board(board_int:int, board_shape:tuple) -> np.ndarray:
     """ 
@@ -317,15 +482,35 @@ def int2board(board_int:int, board_shape:tuple) -> np.ndarray:
                         encoded in the given integer.
     @return: Board as an numpy array.
     """
+    # Memoized boards are shared and so callers
+    # are given a copy that they may modify.
+    return int2board_cached(board_int, tuple(board_shape)).copy()
+
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def int2board_cached(board_int:int, board_shape:tuple) -> np.ndarray:
+    """ 
+    Decodes a board integer as described in int2board(...).
+    Results are memoized so that integers seen before are
+    not decoded again. The returned board must not be modified.
+    @param board_int: Board from some player's 
+                      perspective as an integer.
+    @param board_shape: Shape of the board that's 
+                        encoded in the given integer.
+    @return: Board as an numpy array.
+    """
     board_len = board_shape[0] * board_shape[1]
-    binary_str = bin(board_int)[2:].zfill(board_len*2)
-    board = np.array([-1]*board_len)
-    symbols = binary_str[:board_len]
-    spaces = binary_str[board_len:]
-    for i in range(board_len):
-        if spaces[i] == '1':
-            board[i] = int(symbols[i])
+    # Bits are unpacked from the integer's bytes in one
+    # vectorized step instead of walking a binary string.
+    num_bytes = (board_len*2 + 7) // 8
+    bits = np.unpackbits(np.frombuffer(
+        board_int.to_bytes(num_bytes, 'big'), dtype=np.uint8
+    ))[-board_len*2:]
+    symbols = bits[:board_len]
+    spaces = bits[board_len:]
+    board = np.full(board_len, -1, dtype=np.int8)
+    board[spaces == 1] = symbols[spaces == 1]
     board = board.reshape(board_shape)
+    board.flags.writeable = False
     return board
 
 def get_random_free_pos(board:np.ndarray) -> tuple:
@@ -1,14 +1,23 @@
 import time
+import random
 import numpy as np
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from player import Player
-from utility import int2board
 from utility import board2int
+from utility import board2int_batch
 from utility import track_time
 from utility import print_debug
 from utility import get_datetime_id
+from utility import get_win_masks
+from utility import get_win_line_shifts
 from output_handler import OutputHandler
-from utility import get_world_perspective
 from utility import switch_player_perspective
+from utility import switch_player_perspective_int
+
+# Max. no. of bits of board integers for which
+# transposition tables are preallocated flat lists.
+FLAT_TT_MAX_BITS = 20
 
 class World:
     """ 
@@ -16,13 +25,28 @@ class World:
     that the game world should have for
     both tic tac toe and connect 4.
     """
+
+    # Attributes are stored in fixed slots instead
+    # of a per instance dictionary.
+    __slots__ = (
+        'type', 'board', 'board_int', 'str_cache', 'status',
+        'player_symbols', 'sym_luts', 'last_turn', 'next_turn', 
+        'last_sym', 'next_sym', 'player1', 'player2', 'board_shape', 
+        'output_handler', 'tt_max_size', 'tt_next_max_size', 'is_tt_flat', 
+        'tt_terminal', 'tt_eval', 'tt_reward', 'tt_next', 'num_cells', 'spaces_mask', 
+        'cell_bits', 'win_line_masks', 'win_line_shifts', 'cell_line_masks', 
+        'mirror_col_masks', 'win_mask_groups', 'actions', 'legal_bits'
+    )
     
     def __init__(self, 
         type:str,
         board_size:tuple,
         player1sym:str, 
         player2sym:str,
-        output_handler:OutputHandler
+        output_handler:OutputHandler,
+        win_length:int,
+        tt_max_size:int=1<<20,
+        tt_next_max_size:int=1<<16
     ):
         """ 
         Constructor. 
@@ -31,27 +55,186 @@ class World:
         @param player2sym: Symbol of the second player.
         @param board_size: Size of game board.
         @param output_handler: To manage output generation.
+        @param win_length: No. of pieces in a line that win.
+        @param tt_max_size: Max. no. of entries that each
+                            transposition table can hold. Entries
+                            of Connect 4 boards take about 100 B
+                            (terminal status), 150 B (reward) 
+                            and 350 B (state value) each, so full 
+                            tables with the default of 2^20 entries
+                            take up to about 630 MB together. Flat
+                            tables of small boards (tic tac toe) 
+                            are of fixed size and not limited by this.
+        @param tt_next_max_size: Max. no. of entries of the next 
+                                 states table. Each holds a list 
+                                 of all next states, which takes
+                                 about 850 B on Connect 4 boards, 
+                                 so the default of 2^16 entries 
+                                 takes up to about 55 MB.
         """
         self.type = type
         self.board = None # Board is always from the next player's perspective.
+        self.board_int = None # Board above encoded as an integer.
+        self.str_cache = (None, "") # (board_int, next_turn), string.
+        self.status = None # Terminal status of the board (see is_game_over(...)).
         self.player_symbols = {1:player1sym, 2:player2sym}
+        # Symbols that cells of a board from the perspective 
+        # of each player (turn number) are shown with, 
+        # indexed by cell value + 1 (i.e. space, opponent, self).
+        self.sym_luts = {
+            1: np.array(["#", player2sym, player1sym]),
+            2: np.array(["#", player1sym, player2sym])
+        }
         self.last_turn = 2
         self.next_turn = 1
+        self.last_sym = player2sym # Symbol of the player who moved last.
+        self.next_sym = player1sym # Symbol of the player who moves next.
         self.player1 = None
         self.player2 = None
-        self.__board_size = board_size
+        self.board_shape = tuple(board_size)
         self.output_handler = output_handler
+        # Bits of board integers that mark a player's
+        # pieces and occupied cells respectively are
+        # in two halves of num_cells bits each.
+        self.num_cells = int(np.prod(board_size))
+        self.spaces_mask = (1 << self.num_cells) - 1
+        # Bit of each cell (row major order) in the 
+        # spaces half of board integers. Shifting it
+        # left by num_cells gives its bit in the symbols half.
+        self.cell_bits = tuple(
+            1 << (self.num_cells - 1 - cell_idx) 
+            for cell_idx in range(self.num_cells)
+        )
+        # Transposition tables that map boards (as integers)
+        # to results computed for them before since the
+        # same positions are reached many times over.
+        # Small boards have few enough integers for terminal
+        # status and state value tables to be flat lists 
+        # indexed by the board integer (tic tac toe => 2^18).
+        self.tt_max_size = tt_max_size
+        self.tt_next_max_size = tt_next_max_size
+        self.is_tt_flat = 2 * self.num_cells <= FLAT_TT_MAX_BITS
+        # These are only allocated once first used (see 
+        # get_flat_tt(...)) since worlds that do not search
+        # would otherwise hold millions of empty slots.
+        if self.is_tt_flat:
+            self.tt_terminal = None # board => is_game_over(...)
+            self.tt_eval = None # 2 * board + is_my_turn_next => state_eval(...)
+        else:
+            self.tt_terminal = {} # board => is_game_over(...)
+            self.tt_eval = {} # (board, is_my_turn_next) => state_eval(...)
+        self.tt_reward = {} # (board, action) => get_reward(...)
+        self.tt_next = {} # (board, is_player1) => get_next_states(...)
+        # Masks of all lines that a player can win by filling
+        # and the shifts that find all of them at once.
+        self.win_line_masks = tuple(
+            get_win_masks(board_size, win_length).tolist()
+        )
+        self.win_line_shifts = get_win_line_shifts(board_size, win_length)
+        # Masks of each column's cells in both halves of board 
+        # integers and how far right they must be shifted 
+        # (left if negative) to land on the mirrored column.
+        num_cols = self.board_shape[1]
+        self.mirror_col_masks = tuple(
+            (
+                sum(
+                    1 << (row_idx * num_cols + num_cols - 1 - col_idx)
+                    for row_idx in range(2 * self.board_shape[0])
+                ), 
+                num_cols - 1 - 2 * col_idx
+            ) for col_idx in range(num_cols)
+        )
+        # Masks of lines (as above) through each cell (row major).
+        self.cell_line_masks = tuple(
+            tuple(
+                mask for mask in self.win_line_masks 
+                if mask & cell_bit
+            ) for cell_bit in self.cell_bits
+        )
         self.reset_game()
+        self.win_mask_groups = self.get_win_mask_groups()
+        # Possible actions only depend on the board's
+        # size and the player, so they are computed once.
+        self.actions = {
+            is_player1: tuple(self.get_actions(is_player1))
+            for is_player1 in (True, False)
+        }
+        # Bits of cells that must be free for each of 
+        # the actions above to be legal, in the same order.
+        self.legal_bits = {
+            is_player1: tuple(
+                self.get_legal_bit(action) 
+                for action in self.actions[is_player1]
+            ) for is_player1 in (True, False)
+        }
+
+    def __getstate__(self):
+        """
+        Returns the state of this world to be pickled
+        (e.g. when sent to worker processes) without
+        flat transposition tables, which each process 
+        allocates itself once it needs them.
+        """
+        state, slots = super().__getstate__()
+        if self.is_tt_flat:
+            slots = dict(slots, tt_terminal=None, tt_eval=None)
+        return state, slots
+
+    def get_flat_tt(self, num_bits:int) -> list:
+        """
+        Allocates a flat transposition table.
+        @param num_bits: No. of bits of the integers 
+                         that index the table.
+        @return: List with a None entry per index.
+        """
+        return [None] * (1 << num_bits)
+
+    def tt_store(self, tt:dict, key, val, max_size:int=None):
+        """
+        Stores a value in given transposition table.
+        If the table is full, the oldest entry is evicted.
+        @param tt: Transposition table.
+        @param key: Key of the entry.
+        @param val: Value of the entry.
+        @param max_size: Max. no. of entries of the table
+                         (tt_max_size by default).
+        @return: The stored value.
+        """
+        if max_size is None:
+            max_size = self.tt_max_size
+        if len(tt) >= max_size:
+            del tt[next(iter(tt))]
+        tt[key] = val
+        return val
+
+    def clear_tt(self):
+        """
+        Empties all transposition tables, e.g. once 
+        learning is over such that results of boards
+        seen while learning do not take up memory.
+        """
+        if self.is_tt_flat:
+            self.tt_terminal = None
+            self.tt_eval = None
+        else:
+            self.tt_terminal.clear()
+            self.tt_eval.clear()
+        self.tt_reward.clear()
+        self.tt_next.clear()
 
     def __switch_players(self):
         """
         Sets current player as next player and 
         next player as current player.
         """
-        temp = self.last_turn
-        self.last_turn = self.next_turn
-        self.next_turn = temp
-        self.board = switch_player_perspective(self.board)
+        self.last_turn, self.next_turn = self.next_turn, self.last_turn
+        self.last_sym, self.next_sym = self.next_sym, self.last_sym
+        # The board is not shared after a move,
+        # so it is switched in place.
+        switch_player_perspective(self.board, inplace=True)
+        self.board_int = switch_player_perspective_int(
+            self.board_int, self.board_shape
+        )
 
     def __str__(self):
         """ 
@@ -63,22 +246,24 @@ class World:
                        (false by default).
         @param return: String of the world as it is now.
         """
+        # The string is only rebuilt when the board or
+        # the player whose turn it is next has changed.
+        str_key = (self.board_int, self.next_turn)
+        if self.str_cache[0] == str_key:
+            return self.str_cache[1]
+
         # Get the board in world perspective,
         # independent of that of any particular
-        # player.
-        board_world_perspective = get_world_perspective(
-            self.board, 
-            self.player_symbols[self.next_turn]
-        )
-        to_return = ''
-        row_idx = 0
-        for row in board_world_perspective:
-            to_return += str(row_idx) + " "
-            to_return += " ".join(row)
-            to_return += "\n"
-            row_idx += 1
-        to_return += "  " + " ".join(str(i) for i in range(self.board.shape[1])) + "\n"
-        to_return += f"next turn = {self.player_symbols[self.next_turn]}"
+        # player, with one lookup of all cells.
+        board_world_perspective = self.sym_luts[self.next_turn][self.board + 1]
+        lines = [
+            str(row_idx) + " " + " ".join(row)
+            for row_idx, row in enumerate(board_world_perspective)
+        ]
+        lines.append("  " + " ".join(str(i) for i in range(self.board_shape[1])))
+        lines.append(f"next turn = {self.next_sym}")
+        to_return = "\n".join(lines)
+        self.str_cache = (str_key, to_return)
         return to_return
 
     def get_actions(self, is_player1:bool) -> list:
@@ -89,15 +274,41 @@ class World:
         """
         raise Exception("Not implemented!")
 
-    def is_winner(self, num_board:np.ndarray) -> int:
+    def get_win_mask_groups(self) -> list:
+        """
+        Returns masks of lines that a player can win by 
+        filling in groups, in the order that is_winner(...)
+        checks them. Only matters for invalid boards where 
+        both players have filled a line.
+        @return: List of 2 tuples where the first element is
+                 the order in which player symbols (1 => this
+                 player, 0 => opponent) are checked and the 
+                 second element is a tuple of line masks
+                 (see get_cells_mask(...)).
+        """
+        raise Exception("Not implemented!")
+
+    def is_winner(self, num_board) -> int:
         """ 
         Given a board, return if this player has won.
         @param num_board: Board containing numbers from this
-                        player's perspective.
+                        player's perspective or its integer.
         @param: Returns 1 if this player has won, -1 if the
                 the opponent has one and 0 if no one has won.
         """
-        raise Exception("Not implemented!")
+        board_int = (
+            num_board if isinstance(num_board, int) 
+            else board2int(num_board)
+        )
+        spaces = board_int & self.spaces_mask
+        symbols = board_int >> self.num_cells
+        pieces = {1: symbols, 0: spaces & ~symbols}
+        for sym_order, masks in self.win_mask_groups:
+            for sym in sym_order:
+                for mask in masks:
+                    if pieces[sym] & mask == mask:
+                        return 1 if sym == 1 else -1
+        return 0
 
     def is_valid(self, num_board:np.ndarray, is_player1:bool) -> bool:
         """ Given a board, return if it is a valid
@@ -129,9 +340,152 @@ class World:
         """
         raise Exception("Not implemented!")
 
+    def has_line(self, pieces:int) -> bool:
+        """
+        Returns whether given pieces fill any line 
+        that a player can win by filling.
+        @param pieces: Bits of a player's pieces in 
+                       the spaces half of board integers.
+        @return: True if a line is filled and false otherwise.
+        """
+        # Lines in each direction are found with a few 
+        # shifts and ANDs (see get_win_line_shifts(...)).
+        for shifts, starts_mask in self.win_line_shifts:
+            filled = pieces
+            for shift in shifts:
+                filled &= filled >> shift
+            if filled & starts_mask:
+                return True
+        return False
+
+    def get_legal_bit(self, action:tuple) -> int:
+        """
+        Returns the bit of the cell that must be free
+        for given action to be legal on a board.
+        @param action: A possible action.
+        @return: Bit of the cell in the spaces half of 
+                 board integers (see cell_bits).
+        """
+        raise Exception("Not implemented!")
+
+    def get_move_bit(self, board_int:int, action:tuple) -> int:
+        """
+        Returns the bit of the cell that a piece is placed
+        in upon executing given legal action on given board.
+        @param board_int: Game board as an integer.
+        @param action: The action to take.
+        @return: Bit of the cell in the spaces half of 
+                 board integers (see cell_bits).
+        """
+        raise Exception("Not implemented!")
+
+    def get_next_state_int(self, board_int:int, action:tuple) -> int:
+        """
+        Returns the integer of the board that results from
+        executing given action on given board integer. The
+        piece is placed by setting its bits directly.
+        @param board_int: Game board from the perspective of
+                          the player who executes the action 
+                          as an integer.
+        @param action: The action to take.
+        @return: Integer of next board from the perspective
+                 of the player that took the action, or -1
+                 if the action is illegal or results in 
+                 an invalid state.
+        """
+        if not self.is_legal(board_int, action):
+            return -1
+        move_bit = self.get_move_bit(board_int, action)
+        next_state = board_int | (move_bit << self.num_cells) | move_bit
+        if not self.is_valid(next_state, action[1] == 1):
+            return -1
+        return next_state
+
+    def get_next_board(self, board:np.ndarray, action:tuple) -> np.ndarray:
+        """
+        Returns the board that results from executing 
+        given action on given board or None if the action 
+        is illegal or results in an invalid state.
+        @param board: Game board from the perspective of
+                      the player who executes the action.
+        @param action: The action to take.
+        @return: Next board from the perspective of
+                 the player that took the action, or None.
+        """
+        raise Exception("Not implemented!")
+
+    def get_next_boards(self, board:np.ndarray, is_player1:bool) -> tuple:
+        """
+        Returns boards that result from executing each 
+        legal action on given board (valid or not).
+        @param board: Game board from the perspective of
+                      the player who executes the actions.
+        @param is_player1: Whether player 1 is making the move.
+        @return: 2 tuple with an array of next boards of shape
+                 (no. of legal actions, rows, columns) and 
+                 the list of actions that lead to them.
+        """
+        raise Exception("Not implemented!")
+
     def state_eval(self, board, is_my_turn_next:bool):
         """
-        Computes the value of given state. 
+        Returns the value of given state. Values are
+        looked up in a transposition table and only
+        computed for states not evaluated before.
+        @param board: Game board from perspective of a player.
+        @param is_my_turn_next: True if the next turn is this
+                                player's and false otherwise.
+        @return: Value of this state.
+        """
+        # Values are the same for boards that mirror each 
+        # other left to right, so each value computed is 
+        # stored for the mirrored board as well.
+        board_int = board if isinstance(board, int) else board2int(board)
+        if self.is_tt_flat:
+            tt_eval = self.tt_eval
+            if tt_eval is None:
+                tt_eval = self.tt_eval = self.get_flat_tt(2 * self.num_cells + 1)
+            key = 2 * board_int + is_my_turn_next
+            val = tt_eval[key]
+            if val is None:
+                val = tt_eval[key] = self.compute_state_eval(
+                    board=board, is_my_turn_next=is_my_turn_next
+                )
+                tt_eval[
+                    2 * self.get_mirror_int(board_int) + is_my_turn_next
+                ] = val
+            return val
+        key = (board_int, is_my_turn_next)
+        val = self.tt_eval.get(key)
+        if val is None:
+            val = self.tt_store(self.tt_eval, key, self.compute_state_eval(
+                board=board, is_my_turn_next=is_my_turn_next
+            ))
+            self.tt_store(
+                self.tt_eval, 
+                (self.get_mirror_int(board_int), is_my_turn_next), val
+            )
+        return val
+
+    def get_mirror_int(self, board_int:int) -> int:
+        """
+        Returns the integer of given board mirrored left
+        to right (i.e. with the order of columns reversed).
+        @param board_int: Game board as an integer.
+        @return: Mirrored board as an integer.
+        """
+        mirrored = 0
+        for col_mask, shift in self.mirror_col_masks:
+            if shift >= 0:
+                mirrored |= (board_int & col_mask) >> shift
+            else:
+                mirrored |= (board_int & col_mask) << -shift
+        return mirrored
+
+    def compute_state_eval(self, board, is_my_turn_next:bool):
+        """
+        Computes the value of given state. Boards that mirror
+        each other left to right must have the same value.
         @param board: Game board from perspective of a player.
         @param is_my_turn_next: True if the next turn is this
                                 player's and false otherwise.
@@ -179,10 +533,16 @@ class World:
         Resets the game to the start state.
         """
         # Set board to empty board.
-        self.board = np.full(self.__board_size, -1)
+        self.board = np.full(self.board_shape, -1, dtype=np.int8)
+        self.board_int = board2int(self.board)
+        # An empty board has no lines, so it is not a
+        # terminal state and no table needs to be looked up.
+        self.status = -1
         # Set player 1 to start.
         self.last_turn = 2
         self.next_turn = 1
+        self.last_sym = self.player_symbols[2]
+        self.next_sym = self.player_symbols[1]
 
     def is_game_over(self, board) -> int:
         """
@@ -192,16 +552,48 @@ class World:
         @return: 1 => this player has won. 2 => the opponent
                  has won. 0 => Draw. -1 => Not terminal state.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
+        board_int = board if isinstance(board, int) else board2int(board)
+        if self.is_tt_flat:
+            tt_terminal = self.tt_terminal
+            if tt_terminal is None:
+                tt_terminal = self.tt_terminal = self.get_flat_tt(2 * self.num_cells)
+            status = tt_terminal[board_int]
+            if status is None:
+                status = tt_terminal[board_int] = self.__get_terminal_status(
+                    board_int
+                )
+            return status
+        status = self.tt_terminal.get(board_int)
+        if status is None:
+            status = self.tt_store(
+                self.tt_terminal, board_int,
+                self.__get_terminal_status(board_int)
+            )
+        return status
+
+    def __get_terminal_status(self, board_int:int) -> int:
+        """
+        Computes if this board is a terminal state.
+        @param board_int: The board from the perspective
+                          of one of the players as an integer.
+        @return: 1 => this player has won. 2 => the opponent
+                 has won. 0 => Draw. -1 => Not terminal state.
+        """
+        spaces = board_int & self.spaces_mask
+        symbols = board_int >> self.num_cells
         # Check if either this player or the opponent has won.
-        to_return = self.is_winner(board)
-        if to_return == 1: return 1
-        if to_return == -1: return 2
+        is_won = self.has_line(symbols)
+        is_lost = self.has_line(spaces & ~symbols)
+        if is_won and is_lost: 
+            # Only for invalid boards. The game
+            # decides who is considered the winner.
+            is_won = self.is_winner(board_int) == 1
+            is_lost = not is_won
+        if is_won: return 1
+        if is_lost: return 2
         # If no one has one and there are no more
         # free spaces in the board, then its a draw.
-        num_free = np.count_nonzero(board == -1)
-        if num_free == 0: return 0
+        if spaces == self.spaces_mask: return 0
         # Else this is not a terminal state.
         return -1
 
@@ -230,9 +622,25 @@ class World:
                         illegal or results in an invalid state, 
                         then -150 is returned.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
-        
+        board_int = board if isinstance(board, int) else board2int(board)
+        key = (board_int, action)
+        reward = self.tt_reward.get(key)
+        if reward is None:
+            reward = self.tt_store(
+                self.tt_reward, key,
+                self.__compute_reward(board, action)
+            )
+        return reward
+
+    def __compute_reward(self, board, action:tuple) -> int:
+        """
+        Computes the reward of executing a given action 
+        in given state.
+        @param board: Game board from the perspective
+                      of a player.
+        @param action: That player's action to take.
+        @return reward: The reward as described in get_reward(...).
+        """
         # Return large negative reward 
         # if the action is illegal.
         if not self.is_legal(board, action):
@@ -274,20 +682,69 @@ class World:
                  by executing legal actions in their own
                  perspective and the second element is the 
                  action that was taken to go to that state.
+                 Lists for integer boards are shared between
+                 calls and must not be modified.
         """
-        if type(board) == int:
-            board = int2board(board, self.board.shape)
+        # Integer boards are expanded by setting the 
+        # bits of each move directly, so they never 
+        # need to be decoded into numeric boards. Search
+        # reaches the same boards many times over, so 
+        # their next states are kept in a table.
+        if isinstance(board, int):
+            key = (board, is_player1)
+            next_state_int_action_list = self.tt_next.get(key)
+            if next_state_int_action_list is None:
+                next_state_int_action_list = self.tt_store(
+                    self.tt_next, key,
+                    self.__get_next_states_int(board, is_player1),
+                    max_size=self.tt_next_max_size
+                )
+            return next_state_int_action_list
+        # All next boards are built together and those 
+        # that are invalid are then left out. Validity is 
+        # checked on their integers, which are needed anyway,
+        # rather than by counting pieces in each board.
+        next_boards, actions = self.get_next_boards(board, is_player1)
+        is_valid = self.is_valid
         next_state_int_action_list = []
-        for action in self.get_actions(is_player1):
-            next_state_int = self.get_next_state(board, action)
-            if next_state_int != -1:
+        for next_state_int, action in zip(
+            board2int_batch(next_boards), actions
+        ):
+            if is_valid(next_state_int, is_player1):
+                next_state_int_action_list.append((next_state_int, action))
+        return next_state_int_action_list
+
+    def __get_next_states_int(self, board_int:int, is_player1:bool) -> list:
+        """
+        Returns possible next states as described in 
+        get_next_states(...) for a board integer.
+        @param board_int: Game board as an integer.
+        @param is_player1: Whether player 1 is making 
+                           the move.
+        @return: List of (next state integer, action) tuples.
+        """
+        # Actions whose legal bit is set in the board are
+        # skipped without calling is_legal(...) for each.
+        num_cells = self.num_cells
+        get_move_bit = self.get_move_bit
+        is_valid = self.is_valid
+        next_state_int_action_list = []
+        for action, legal_bit in zip(
+            self.actions[is_player1], self.legal_bits[is_player1]
+        ):
+            if board_int & legal_bit:
+                continue
+            move_bit = get_move_bit(board_int, action)
+            next_state_int = board_int | (move_bit << num_cells) | move_bit
+            if is_valid(next_state_int, is_player1):
                 next_state_int_action_list.append((next_state_int, action))
         return next_state_int_action_list
 
     def make_move(self, action:tuple) -> bool:
         """
         Executes given action on current board if it's 
-        legal and results in a valid board state.
+        legal and results in a valid board state. The
+        terminal status of the new board is also updated.
         @param action: Action to take.
         @return: True if the action was executed and 
                  false otherwise.
@@ -297,21 +754,52 @@ class World:
         if action[1] != self.next_turn:
             return False
         
-        # If the move is invalid, then
-        # this move will not be executed.
-        if not self.is_legal(self.board, action): 
+        # The next state obtained upon executing
+        # the move as per this player's perspective,
+        # is computed on the board integer. If the move 
+        # is illegal or invalid, then it is not executed.
+        next_state = self.get_next_state_int(self.board_int, action)
+        if next_state == -1:
             return False
 
-        # The next state obtained upon executing
-        # the move as per this player's
-        # perspective, is fetched.
-        next_state = self.get_next_state(self.board, action)
-        if next_state != -1: # The next state is valid.
-            self.board = int2board(next_state, self.board.shape)
-            self.__switch_players()
-            return True
+        # The numeric board only needs the one cell 
+        # that the piece was placed in to be set. 
+        # Cell i is bit num_cells - 1 - i of the spaces half.
+        move_bit = (next_state ^ self.board_int) & self.spaces_mask
+        cell_idx = self.num_cells - move_bit.bit_length()
+        next_board = self.board.copy()
+        next_board.flat[cell_idx] = 1
+        self.board = next_board
+        self.board_int = next_state
+        self.__switch_players()
+        if self.status == -1:
+            # No one had won before this move, so only lines 
+            # through the cell just played can be filled now.
+            self.status = self.__get_status_after_move(cell_idx)
         else:
-            return False
+            self.status = self.is_game_over(self.board_int)
+        return True
+
+    def __get_status_after_move(self, cell_idx:int) -> int:
+        """
+        Computes the terminal status (see is_game_over(...))
+        of the current board given that the board before 
+        the last move was not terminal.
+        @param cell_idx: Flat index of the cell that the 
+                         last move placed a piece in.
+        @return: Terminal status of the current board.
+        """
+        # The board is from the next player's perspective,
+        # so the pieces of the player who just moved are
+        # the occupied cells that are not the next player's.
+        spaces = self.board_int & self.spaces_mask
+        pieces_last = spaces & ~(self.board_int >> self.num_cells)
+        for mask in self.cell_line_masks[cell_idx]:
+            if pieces_last & mask == mask:
+                return 2
+        if spaces == self.spaces_mask:
+            return 0
+        return -1
 
     @track_time
     def play1game(self, 
@@ -348,9 +836,11 @@ class World:
         if self.player1 is None or self.player2 is None:
             raise Exception('No players. Please configure players.')
         
-        outcome = {sym: {
-            'won': 0, 'lost': 0, 'avg_milliseconds_per_move': 0, 'num_moves': 0,
-        } for sym in self.player_symbols.values()}
+        # Per player (index = turn number - 1) totals that
+        # the outcome is built from once the game is over.
+        milliseconds = [0, 0] # Total time taken to pick moves.
+        num_timed_moves = [0, 0] # No. of moves timed above.
+        num_moves = [0, 0] # No. of moves made.
 
         # Reset game.
         self.reset_game()
@@ -367,46 +857,69 @@ class World:
                 game_num=game_num, session_timestamp=session_timestamp
             )
 
+        # Whether to print / log the world state after
+        # each move does not change during the game.
+        print_moves = "print" in out_config and out_config['print']['moves']
+        log_moves = "log" in out_config and out_config['log']['moves']
+        print_out = self.output_handler.print_out
+        log_world_state = self.output_handler.log_world_state
+        # Methods called on every move are looked up once.
+        get_move = {1: self.player1.get_move, 2: self.player2.get_move}
+        make_move = self.make_move
+
         # Print / log world state if required.
-        if "print" in out_config and out_config['print']['moves']:
-            self.output_handler.print_out(self.__str__())
-        if "log" in out_config and out_config['log']['moves']:
-            self.output_handler.log_world_state(
-                world_type=self.type, session_id=session_id,
-                session_timestamp=session_timestamp, 
-                world_str=self.__str__()
-            )
+        if print_moves or log_moves:
+            world_str = self.__str__()
+            if print_moves:
+                print_out(world_str)
+            if log_moves:
+                log_world_state(
+                    world_type=self.type, session_id=session_id,
+                    session_timestamp=session_timestamp, 
+                    world_str=world_str
+                )
 
         # Keep making moves until a terminal
         # state is reached.
-        while self.is_game_over(self.board) == -1:
-            next_player = self.player1 if self.next_turn == 1 else self.player2
-            move_pos_out = next_player.get_move(self.board)
-            outcome[self.player_symbols[self.next_turn]]['avg_milliseconds_per_move'] = (
-                outcome[self.player_symbols[self.next_turn]]['avg_milliseconds_per_move'] 
-                + move_pos_out['milliseconds']
-            ) / 2
-            move_action = (move_pos_out['f_out'], self.next_turn)
-            is_success = self.make_move(move_action) # Board perspective switched.
+        while self.status == -1:
+            next_turn = self.next_turn
+            move_pos_out = get_move[next_turn](self.board, self.board_int)
+            milliseconds[next_turn - 1] += move_pos_out['milliseconds']
+            num_timed_moves[next_turn - 1] += 1
+            move_action = (move_pos_out['f_out'], next_turn)
+            is_success = make_move(move_action) # Board perspective switched.
             if not is_success: 
                 print(f"Move {move_action[0]} could not be executed.")
-            outcome[self.player_symbols[self.last_turn]]['num_moves'] += 1
+            num_moves[self.last_turn - 1] += 1
 
             # Print / log world state if required.
-            if "print" in out_config and out_config['print']['moves']:
-                self.output_handler.print_out(self.__str__())
-            if "log" in out_config and out_config['log']['moves']:
-                self.output_handler.log_world_state(
-                    world_type=self.type, session_id=session_id,
-                    session_timestamp=session_timestamp, 
-                    world_str=self.__str__()
-                )
+            if print_moves or log_moves:
+                world_str = self.__str__()
+                if print_moves:
+                    print_out(world_str)
+                if log_moves:
+                    log_world_state(
+                        world_type=self.type, session_id=session_id,
+                        session_timestamp=session_timestamp, 
+                        world_str=world_str
+                    )
     
-        # Determine winner if any.
-        if self.is_winner(self.board) == 1:
-            outcome[self.player_symbols[self.next_turn]]['won'] += 1
-        elif self.is_winner(self.board) == -1:
-            outcome[self.player_symbols[self.last_turn]]['won'] += 1
+        # Determine winner if any from the 
+        # terminal status of the final board.
+        outcome = {}
+        for turn, sym in self.player_symbols.items():
+            outcome[sym] = {
+                'won': 0,
+                'avg_milliseconds_per_move': (
+                    milliseconds[turn - 1] / num_timed_moves[turn - 1]
+                    if num_timed_moves[turn - 1] > 0 else 0
+                ),
+                'num_moves': num_moves[turn - 1],
+            }
+        if self.status == 1:
+            outcome[self.next_sym]['won'] += 1
+        elif self.status == 2:
+            outcome[self.last_sym]['won'] += 1
 
         # Print / log game outcome if needed.
         if (
@@ -427,11 +940,31 @@ class World:
 
         return outcome
 
-    def play(self, id:str, out_config:dict={}, num_games:int=1):
+    def play(self, 
+        id:str, out_config:dict={}, 
+        num_games:int=1, num_workers:int=1,
+        seed:int=None
+    ):
         """ 
         Conducts one or more game sessions.
         @param id: String that identifies this play session.
         @param num_games: No. of games to play.
+        @param num_workers: No. of processes to play games in
+                            parallel. Games are played one after
+                            the other in this process if this is 1.
+                            Workers play with copies of this world, 
+                            so any learning during games is not kept.
+                            Games played by workers are not printed 
+                            and their logs are written out in game
+                            order once games are over. Workers cannot
+                            read from the terminal, so players with 
+                            manual strategies can only play if this is 1.
+        @param seed: Random seed that each game is seeded from
+                     along with its number such that sessions
+                     have the same outcomes however many workers
+                     play them. If this is None, games played in 
+                     this process are not seeded and a random seed
+                     is picked for workers.
         @param out_config: The configuration of how results are to be
                            output (in the terminal or saved into a file).
                            Expected format: { # Note! * => optional
@@ -452,128 +985,241 @@ class World:
         @return game_metrics: Data about games that
                               were played.
         """
+        if num_workers > 1 and any(
+            player is not None and player.strategy.is_interactive
+            for player in (self.player1, self.player2)
+        ): raise Exception(
+            'Games with manual players cannot be played by '
+            + 'workers (num_workers > 1) as they have no terminal.'
+        )
+
         # Time stamp that identifies this run.
         session_timestamp = get_datetime_id()
 
         # Initialize average game outcomes for each game.
         outcome_all_games = {sym: {
-            'won': 0, 'lost': 0, 'avg_milliseconds_per_move': 0, 'num_moves': 0,
+            'won': 0, 'avg_milliseconds_per_move': 0, 'num_moves': 0,
         } for sym in self.player_symbols.values()}
         outcome_all_games['num_draws'] = 0
         outcome_all_games['num_games'] = num_games
         outcome_all_games['milliseconds'] = 0
         
-        # Print / log status update if required.
-        if "print" in out_config and out_config['print']['status']:
-            self.output_handler.print_start_status(
-                world_type=self.type, session_id=id
-            )
-        if "log" in out_config and out_config['log']['status']:
-            self.output_handler.log_start_status(
-                world_type=self.type, session_id=id,
-                session_timestamp=session_timestamp
-            )
+        try:
+            # Print / log status update if required.
+            if "print" in out_config and out_config['print']['status']:
+                self.output_handler.print_start_status(
+                    world_type=self.type, session_id=id
+                )
+            if "log" in out_config and out_config['log']['status']:
+                self.output_handler.log_start_status(
+                    world_type=self.type, session_id=id,
+                    session_timestamp=session_timestamp
+                )
 
-        # Play specified no. of games.
-        for i in range(num_games):
+            # Rows of game metrics to be saved in CSV format.
+            csv_rows = []
 
-            # Play one game.
-            outcome = self.play1game(
-                game_num=i+1,
-                session_id=id, 
-                out_config=out_config,
-                session_timestamp=session_timestamp
-            )
+            # Results of each game (rows) for player 1 and 2 (columns) 
+            # that session metrics are computed from at the end.
+            players_syms = (self.player1.symbol, self.player2.symbol)
+            game_won = np.zeros((num_games, 2), dtype=np.int64)
+            game_num_moves = np.zeros((num_games, 2), dtype=np.int64)
+            game_milliseconds_per_move = np.zeros((num_games, 2))
+            game_milliseconds = np.zeros(num_games)
 
-            # Record metrics in CSV format if needed.
-            winner = 0
-            if outcome['f_out'][self.player_symbols[1]]['won'] > 0:
-                winner = 1
-            elif outcome['f_out'][self.player_symbols[2]]['won'] > 0:
-                winner = 2
+            # Play specified no. of games either one after the
+            # other or spread across a pool of worker processes.
+            if num_workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=num_workers, 
+                    initializer=init_worker,
+                    initargs=(
+                        self, 
+                        np.random.randint(1 << 31) if seed is None else seed
+                    )
+                ) as executor:
+                    # Games are sent to workers in chunks so that 
+                    # short games do not wait on one round trip
+                    # between processes each.
+                    outcomes = executor.map(
+                        play1game_worker, range(1, num_games+1),
+                        repeat(id), repeat(out_config), 
+                        repeat(session_timestamp),
+                        chunksize=max(1, num_games // (4 * num_workers))
+                    )
+            else:
+                def play_games():
+                    for game_num in range(1, num_games+1):
+                        if seed is not None:
+                            seed_game(seed, game_num)
+                        yield self.play1game(
+                            game_num=game_num,
+                            session_id=id, 
+                            out_config=out_config,
+                            session_timestamp=session_timestamp
+                        )
+                outcomes = play_games()
+            # Values that are the same for every game.
+            sym1, sym2 = self.player_symbols[1], self.player_symbols[2]
+            strategy1_name = self.player1.strategy.name
+            strategy2_name = self.player2.strategy.name
+            is_csv = "csv" in out_config
+            append_to_logs = self.output_handler.append_to_logs
+            for i, outcome in enumerate(outcomes):
+                # Write out lines that a worker logged during this game.
+                for filename, out_str in outcome.get('logs', ()):
+                    append_to_logs(filename, out_str)
+                game_outcome = outcome['f_out']
+                outcome1, outcome2 = game_outcome[sym1], game_outcome[sym2]
+
+                # Record metrics in CSV format if needed.
+                winner = 0
+                if outcome1['won'] > 0:
+                    winner = 1
+                elif outcome2['won'] > 0:
+                    winner = 2
+                if is_csv:
+                    csv_rows.append((
+                        self.type,
+                        strategy1_name,
+                        strategy2_name,
+                        winner,
+                        outcome1['avg_milliseconds_per_move'],
+                        outcome2['avg_milliseconds_per_move'],
+                        outcome1['num_moves'] + outcome2['num_moves'],
+                        id,
+                        session_timestamp,
+                        outcome['milliseconds'],
+                        i+1
+                    ))
+
+                # Record each player's results in this game.
+                for player_idx, sym in enumerate(players_syms):
+                    player_outcome = game_outcome[sym]
+                    game_won[i, player_idx] = player_outcome['won']
+                    game_num_moves[i, player_idx] = player_outcome['num_moves']
+                    game_milliseconds_per_move[i, player_idx] = (
+                        player_outcome['avg_milliseconds_per_move']
+                    )
+                game_milliseconds[i] = outcome['milliseconds']
+
+            # Save metrics of all games into the CSV at once.
             if "csv" in out_config:
-                self.output_handler.append_to_csv(
-                    world_type=self.type,
-                    player1=self.player1.strategy.name,
-                    player2=self.player2.strategy.name,
-                    outcome=winner,
-                    avg_milliseconds_per_move_player1=outcome['f_out'][
-                        self.player_symbols[1]
-                    ]['avg_milliseconds_per_move'],
-                    avg_milliseconds_per_move_player2=outcome['f_out'][
-                        self.player_symbols[2]
-                    ]['avg_milliseconds_per_move'],
-                    num_moves=outcome['f_out'][
-                        self.player_symbols[1]
-                    ]['num_moves'] + outcome['f_out'][
-                        self.player_symbols[2]
-                    ]['num_moves'],
+                self.output_handler.append_rows_to_csv(
+                    world_type=self.type, rows=csv_rows,
                     filename=(
                         out_config['csv']['filename']
                         if 'filename' in out_config['csv']
                         else None
-                    ),
-                    session_id=id,
-                    session_timestamp=session_timestamp,
-                    game_num=i+1,
-                    milliseconds=outcome['milliseconds']
+                    )
                 )
 
-            # Player 1's average performance.
-            outcome_all_games[self.player1.symbol]['won'] += outcome['f_out'][
-                self.player1.symbol
-            ]['won']
-            outcome_all_games[self.player1.symbol]['lost'] += outcome['f_out'][
-                self.player1.symbol
-            ]['lost']
-            outcome_all_games[self.player1.symbol]['num_moves'] += outcome['f_out'][
-                self.player1.symbol
-            ]['num_moves']
-            outcome_all_games[self.player1.symbol]['avg_milliseconds_per_move'] = (
-                outcome_all_games[self.player1.symbol]['avg_milliseconds_per_move'] + 
-                outcome['f_out'][self.player1.symbol]['avg_milliseconds_per_move']
-            ) / 2
-
-            # Player 2's average performance.
-            outcome_all_games[self.player2.symbol]['won'] += outcome['f_out'][
-                self.player2.symbol
-            ]['won']
-            outcome_all_games[self.player2.symbol]['lost'] += outcome['f_out'][
-                self.player2.symbol
-            ]['lost']
-            outcome_all_games[self.player2.symbol]['num_moves'] += outcome['f_out'][
-                self.player2.symbol
-            ]['num_moves']
-            outcome_all_games[self.player2.symbol]['avg_milliseconds_per_move'] = (
-                outcome_all_games[self.player2.symbol]['avg_milliseconds_per_move'] + 
-                outcome['f_out'][self.player2.symbol]['avg_milliseconds_per_move']
-            ) / 2
-
-            # Average game time taken.
+            # Average time per move is over all moves
+            # of all games rather than over game averages.
+            total_won = game_won.sum(axis=0)
+            total_num_moves = game_num_moves.sum(axis=0)
+            total_milliseconds = (game_milliseconds_per_move * game_num_moves).sum(axis=0)
+            for player_idx, sym in enumerate(players_syms):
+                outcome_all_games[sym]['won'] = int(total_won[player_idx])
+                outcome_all_games[sym]['num_moves'] = int(total_num_moves[player_idx])
+                outcome_all_games[sym]['avg_milliseconds_per_move'] = (
+                    float(total_milliseconds[player_idx] / total_num_moves[player_idx])
+                    if total_num_moves[player_idx] > 0 else 0
+                )
             outcome_all_games['milliseconds'] = (
-                outcome_all_games['milliseconds'] +
-                outcome['milliseconds']
-            ) / 2
+                float(game_milliseconds.mean()) if num_games > 0 else 0
+            )
 
-        #  Determine no. of draws.
-        outcome_all_games['num_draws'] = (num_games - (
-            outcome_all_games[self.player1.symbol]['won']
-            + outcome_all_games[self.player2.symbol]['won']
-        ))
+            #  Determine no. of draws.
+            outcome_all_games['num_draws'] = (num_games - (
+                outcome_all_games[self.player1.symbol]['won']
+                + outcome_all_games[self.player2.symbol]['won']
+            ))
 
-        # Print / log session metrics if required.
-        if (
-            "print" in out_config and 
-            "session" in out_config['print']['metrics']
-        ): self.output_handler.print_metrics(
-            world_type=self.type, session_id=id,
-            metrics=outcome_all_games
+            # Print / log session metrics if required.
+            if (
+                "print" in out_config and 
+                "session" in out_config['print']['metrics']
+            ): self.output_handler.print_metrics(
+                world_type=self.type, session_id=id,
+                metrics=outcome_all_games
+            )
+            if (
+                "log" in out_config and 
+                "session" in out_config['log']['metrics']
+            ): self.output_handler.log_metrics(
+                world_type=self.type, session_id=id,
+                session_timestamp=session_timestamp,
+                metrics=outcome_all_games
+            )
+        finally:
+            # Log files of this session are closed even
+            # if the session ends with an error.
+            self.output_handler.close_logs()
+
+        return outcome_all_games
+
+# World that games are played in by each worker process.
+worker_world = None
+# Random seed that each worker process derives game seeds from.
+worker_seed = None
+
+def init_worker(world:World, seed:int):
+    """
+    Sets up a worker process to play games.
+    @param world: World with configured players.
+    @param seed: Random seed that games are seeded from.
+    """
+    global worker_world, worker_seed
+    worker_world = world
+    worker_seed = seed
+
+def seed_game(seed:int, game_num:int):
+    """
+    Seeds random number generators for a game such 
+    that each game of a session makes its own moves.
+    @param seed: Random seed of the session.
+    @param game_num: Game number.
+    """
+    random.seed(seed + game_num)
+    np.random.seed((seed + game_num) % (1 << 32))
+
+def play1game_worker(
+    game_num:int, 
+    session_id:str, 
+    out_config:dict,
+    session_timestamp:str
+) -> dict:
+    """
+    Plays one game in a worker process. Each game 
+    is seeded by its number so that workers do not 
+    repeat the random moves of one another.
+    @param game_num: Game number.
+    @param session_id: String that identifies this play session.
+    @param out_config: Output configuration (see World.play(...)).
+    @param session_timestamp: Unique time stamp ID of the 
+                              play session.
+    @return: Game outcome as returned by World.play1game(...)
+             with an added 'logs' list of (filename, string)
+             pairs that the game logged.
+    """
+    seed_game(worker_seed, game_num)
+    # Games played at the same time in different workers
+    # would interleave their lines in the terminal and log
+    # file. So, nothing is printed per game in workers and
+    # lines to be logged are returned with the outcome for 
+    # the main process to write out in game order.
+    out_config = {k: v for k, v in out_config.items() if k != 'print'}
+    output_handler = worker_world.output_handler
+    output_handler.log_buffer = []
+    try:
+        outcome = worker_world.play1game(
+            game_num=game_num,
+            session_id=session_id,
+            out_config=out_config,
+            session_timestamp=session_timestamp
         )
-        if (
-            "log" in out_config and 
-            "session" in out_config['log']['metrics']
-        ): self.output_handler.log_metrics(
-            world_type=self.type, session_id=id,
-            session_timestamp=session_timestamp,
-            metrics=outcome_all_games
-        )
\ No newline at end of file
+        outcome['logs'] = output_handler.log_buffer
+    finally:
+        output_handler.log_buffer = None
+    return outcome